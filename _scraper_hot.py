@@ -0,0 +1,67 @@
+# _scraper_hot.py - JSON walking helpers used on every search response.
+# Plain typed Python so it can be compiled with mypyc (see Dockerfile); when no
+# compiled extension is present, this module is imported as-is.
+import math
+import re
+from collections import deque
+from typing import Any, List, Optional
+
+_NUM_STRIP = re.compile(r"[^\d.\-]")
+
+_PRICE_KEYS: frozenset = frozenset({"price", "mrp", "selling_price", "offer_price", "final_price", "amount", "value"})
+_NAME_KEYS: frozenset = frozenset({"name", "title", "display_name", "label", "product_name"})
+
+def _safe_float(x: Any) -> Optional[float]:
+    if x is None: return None
+    if isinstance(x, (int, float)): return float(x)
+    # Clean numeric strings like "49.00" convert directly, skipping the regex;
+    # "nan"/"inf" parse as floats but aren't prices, so they fall through to it
+    s: str = x if isinstance(x, str) else str(x)
+    try:
+        v: float = float(s)
+        if math.isfinite(v):
+            return v
+    except ValueError:
+        pass
+    s = _NUM_STRIP.sub("", s)
+    try:
+        return float(s)
+    except Exception:
+        return None
+
+def _find_price_candidates(obj: Any) -> List[float]:
+    """Collect every numeric value stored under a price-like key anywhere in obj"""
+    candidates: List[float] = []
+    stack: deque = deque([obj])
+    while stack:
+        node: Any = stack.pop()
+        if type(node) is dict:
+            for k, v in node.items():
+                # Most JSON keys are already lowercase; skip the extra string for those
+                if (k if k.islower() else k.lower()) in _PRICE_KEYS:
+                    val: Optional[float] = _safe_float(v)
+                    if val is not None:
+                        candidates.append(val)
+                if type(v) in (dict, list):
+                    stack.append(v)
+        elif type(node) is list:
+            stack.extend(node)
+    return candidates
+
+def _collect_names(obj: Any) -> List[str]:
+    """Collect name-like string values from obj, in document order"""
+    names: List[str] = []
+    # (key, value) pairs, pushed in reverse so they pop in the original order
+    stack: deque = deque([(None, obj)])
+    while stack:
+        key: Optional[str]
+        node: Any
+        key, node = stack.pop()
+        if type(node) is str:
+            if key is not None and (key if key.islower() else key.lower()) in _NAME_KEYS:
+                names.append(node)
+        elif type(node) is dict:
+            stack.extend(reversed(node.items()))
+        elif type(node) is list:
+            stack.extend((None, el) for el in reversed(node))
+    return names
@@ -1,11 +1,27 @@
-from playwright.sync_api import sync_playwright
 import json
 from typing import Dict, Any, Optional
 
+from playwright_session import PlaywrightSession
+
 # sensible defaults
 DEFAULT_LAT = 28.7041
 DEFAULT_LON = 77.1025
 
+def _warm_up(page):
+    # initial navigation to set cookies/session
+    page.goto("https://blinkit.com", wait_until="networkidle", timeout=30000)
+    page.wait_for_timeout(2000)
+
+# Upper bound for one search, including warm-up (~32s) plus the search call on first use;
+# past it the session swaps in a fresh browser instead of queueing behind a hung page
+_SEARCH_TIMEOUT = 60
+
+# Browser session reused across searches; the browser starts on the first search
+_SESSION = PlaywrightSession("blinkit-playwright", _warm_up)
+
+def _get_blinkit_session() -> PlaywrightSession:
+    return _SESSION
+
 def call_blinkit_api(search_query: str = "milk", location_lat: Optional[float] = None, location_lon: Optional[float] = None) -> Dict[str, Any]:
     """
     Call Blinkit API using Playwright to bypass anti-bot protection.
@@ -18,91 +34,65 @@ def call_blinkit_api(search_query: str = "milk", location_lat: Optional[float] =
     except Exception:
         lat_val, lon_val = DEFAULT_LAT, DEFAULT_LON
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-blink-features=AutomationControlled"
-            ]
-        )
-
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
-            extra_http_headers={"accept-language": "en-US,en;q=0.9"}
-        )
-
-        page = context.new_page()
+    # Use encodeURIComponent for the query inside the JS
+    safe_query = json.dumps(search_query)  # safe Python -> JS string literal
+    js = f"""
+    (async () => {{
+        try {{
+            const q = encodeURIComponent({safe_query});
+            const url = `https://blinkit.com/v1/layout/search?q=${{q}}&search_type=type_to_search`;
+            const response = await fetch(url, {{
+                method: 'POST',
+                headers: {{
+                    'accept': '*/*',
+                    'accept-language': 'en-US,en;q=0.9',
+                    'access_token': 'null',
+                    'app_client': 'consumer_web',
+                    'app_version': '1010101010',
+                    'content-type': 'application/json',
+                    'origin': 'https://blinkit.com',
+                    'referer': `https://blinkit.com/s/?q=${{q}}`,
+                    'user-agent': navigator.userAgent,
+                    // add lat/lon here if present as numbers
+                    'lat': '{lat_val}',
+                    'lon': '{lon_val}',
+                }},
+                body: JSON.stringify({{
+                    "applied_filters": null,
+                    "monet_assets": [{{"name":"ads_vertical_banner","processed":0,"total":0}}],
+                    "postback_meta": {{
+                        "processedGroupIds": [],
+                        "pageMeta": {{"scrollMeta":[{{"entitiesCount":95}}]}}
+                    }},
+                    "previous_search_query": {safe_query},
+                    "processed_rails": {{}},
+                    "vertical_cards_processed": 12
+                }})
+            }});
+            if (!response.ok) {{
+                return {{ success:false, status:response.status, error: 'HTTP ' + response.status, text: await response.text() }};
+            }}
+            const data = await response.json();
+            return {{ success:true, status: response.status, data }};
+        }} catch (err) {{
+            return {{ success:false, status:'eval_error', error: err.message }};
+        }}
+    }})();
+    """
+
+    def _search(page):
+        # grant geolocation if possible (optional)
         try:
-            # initial navigation to set cookies/session
-            page.goto("https://blinkit.com", wait_until="networkidle", timeout=30000)
-            page.wait_for_timeout(2000)
-
-            # grant geolocation if possible (optional)
-            try:
-                context.grant_permissions(["geolocation"], origin="https://blinkit.com")
-                context.set_geolocation({"latitude": lat_val, "longitude": lon_val})
-            except Exception:
-                pass
-
-            # Use encodeURIComponent for the query inside the JS
-            safe_query = json.dumps(search_query)  # safe Python -> JS string literal
-            js = f"""
-            (async () => {{
-                try {{
-                    const q = encodeURIComponent({safe_query});
-                    const url = `https://blinkit.com/v1/layout/search?q=${{q}}&search_type=type_to_search`;
-                    const response = await fetch(url, {{
-                        method: 'POST',
-                        headers: {{
-                            'accept': '*/*',
-                            'accept-language': 'en-US,en;q=0.9',
-                            'access_token': 'null',
-                            'app_client': 'consumer_web',
-                            'app_version': '1010101010',
-                            'content-type': 'application/json',
-                            'origin': 'https://blinkit.com',
-                            'referer': `https://blinkit.com/s/?q=${{q}}`,
-                            'user-agent': navigator.userAgent,
-                            // add lat/lon here if present as numbers
-                            'lat': '{lat_val}',
-                            'lon': '{lon_val}',
-                        }},
-                        body: JSON.stringify({{
-                            "applied_filters": null,
-                            "monet_assets": [{{"name":"ads_vertical_banner","processed":0,"total":0}}],
-                            "postback_meta": {{
-                                "processedGroupIds": [],
-                                "pageMeta": {{"scrollMeta":[{{"entitiesCount":95}}]}}
-                            }},
-                            "previous_search_query": {safe_query},
-                            "processed_rails": {{}},
-                            "vertical_cards_processed": 12
-                        }})
-                    }});
-                    if (!response.ok) {{
-                        return {{ success:false, status:response.status, error: 'HTTP ' + response.status, text: await response.text() }};
-                    }}
-                    const data = await response.json();
-                    return {{ success:true, status: response.status, data }};
-                }} catch (err) {{
-                    return {{ success:false, status:'eval_error', error: err.message }};
-                }}
-            }})();
-            """
-            api_response = page.evaluate(js)
-            return api_response
-
-        except Exception as e:
-            return {"success": False, "error": f"Playwright error: {e}", "status": "playwright_error"}
-        finally:
-            try:
-                context.close()
-                browser.close()
-            except Exception:
-                pass
+            page.context.grant_permissions(["geolocation"], origin="https://blinkit.com")
+            page.context.set_geolocation({"latitude": lat_val, "longitude": lon_val})
+        except Exception:
+            pass
+        return page.evaluate(js)
+
+    try:
+        return _get_blinkit_session().run(_search, timeout=_SEARCH_TIMEOUT)
+    except Exception as e:
+        return {"success": False, "error": f"Playwright error: {e}", "status": "playwright_error"}
 
 
 def extract_products_from_blinkit_response(api_response: Dict[str, Any]) -> list:
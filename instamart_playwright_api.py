@@ -1,7 +1,8 @@
-from playwright.sync_api import sync_playwright
 import json
 from typing import Dict, Any, Optional
 
+from playwright_session import PlaywrightSession
+
 # Default location (Gurgaon coordinates from your curl)
 DEFAULT_LAT = 28.4310129
 DEFAULT_LON = 77.0601168
@@ -9,6 +10,75 @@ DEFAULT_STORE_ID = "1402609"
 DEFAULT_PRIMARY_STORE_ID = "1402609"
 DEFAULT_SECONDARY_STORE_ID = "1398454"
 
+# Location used for the browser session (from the working curl command's userLocation)
+_SESSION_LAT = 28.43100375184627
+_SESSION_LON = 77.06019457429646
+
+def _warm_up(page):
+    """Establish the Instamart session, location and cookies once per browser"""
+    lat_val, lon_val = _SESSION_LAT, _SESSION_LON
+    context = page.context
+
+    # Navigate to Swiggy Instamart first to establish session and cookies
+    print(f"🌐 Navigating to Swiggy Instamart to establish session...")
+    page.goto("https://www.swiggy.com/instamart", wait_until="networkidle", timeout=30000)
+    page.wait_for_timeout(3000)
+
+    # Try to set location in the browser first
+    try:
+        print(f"📍 Setting location to {lat_val}, {lon_val}")
+        context.grant_permissions(["geolocation"], origin="https://www.swiggy.com")
+        context.set_geolocation({"latitude": lat_val, "longitude": lon_val})
+        page.wait_for_timeout(2000)
+    except Exception as e:
+        print(f"⚠️ Could not set geolocation: {e}")
+
+    # Navigate to a search page first to establish better session
+    try:
+        search_url = "https://www.swiggy.com/stores/instamart/search?custom_back=true&query=milk"
+        print(f"🔗 Navigating to search page: {search_url}")
+        page.goto(search_url, wait_until="networkidle", timeout=20000)
+        page.wait_for_timeout(2000)
+    except Exception as e:
+        print(f"⚠️ Could not navigate to search page: {e}")
+
+    # Set essential cookies that might be needed (from your curl command)
+    try:
+        print(f"🍪 Setting location cookies...")
+        page.context.add_cookies([
+            {
+                "name": "lat",
+                "value": f"s%3A{lat_val}.VHRw%2BP8XzYg%2BMH900XtRjjjRATsXw13H3UqVXAMvUZ8",
+                "domain": ".swiggy.com",
+                "path": "/"
+            },
+            {
+                "name": "lng",
+                "value": f"s%3A{lon_val}.ZkQBMduicVAJY5V1e%2BmGiJu0%2BHK2pZwQrxpHFI2bnwA",
+                "domain": ".swiggy.com",
+                "path": "/"
+            },
+            {
+                "name": "address",
+                "value": "s%3Afirst%20floor%2C%201568%2C%20Sector%2046%2C%20Huda%20Colony%2C%20Sector%20.JkOQdT2%2BT9x6BNPGiW9DpX72%2B%2BfET8X8CfZy0h74jnI",
+                "domain": ".swiggy.com",
+                "path": "/"
+            }
+        ])
+        page.wait_for_timeout(1000)
+    except Exception as e:
+        print(f"⚠️ Could not set cookies: {e}")
+
+# Upper bound for one search, including warm-up (~60s with the search page) plus the search call
+# on first use; past it the session swaps in a fresh browser instead of queueing behind a hung page
+_SEARCH_TIMEOUT = 90
+
+# Browser session reused across searches; the browser starts on the first search
+_SESSION = PlaywrightSession("instamart-playwright", _warm_up)
+
+def _get_instamart_session() -> PlaywrightSession:
+    return _SESSION
+
 def call_instamart_api(search_query: str = "milk",
                       location_lat: Optional[float] = None,
                       location_lon: Optional[float] = None,
@@ -17,159 +87,84 @@ def call_instamart_api(search_query: str = "milk",
     Call Instamart (Swiggy) API using Playwright to bypass anti-bot protection.
     Based on the exact curl command provided for Instamart search.
     """
-    # Use the exact coordinates from your working curl command
-    lat_val = 28.43100375184627  # From your curl userLocation
-    lon_val = 77.06019457429646  # From your curl userLocation
-
     # Use the exact store IDs from your curl command
     store_id = "1402609"
     primary_store_id = "1402609"
     secondary_store_id = "1398454"
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-blink-features=AutomationControlled"
-            ]
-        )
-
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
-            extra_http_headers={"accept-language": "en-US,en;q=0.9"}
-        )
-
-        page = context.new_page()
-        try:
-            # Navigate to Swiggy Instamart first to establish session and cookies
-            print(f"🌐 Navigating to Swiggy Instamart to establish session...")
-            page.goto("https://www.swiggy.com/instamart", wait_until="networkidle", timeout=30000)
-            page.wait_for_timeout(3000)
-
-            # Try to set location in the browser first
-            try:
-                print(f"📍 Setting location to {lat_val}, {lon_val}")
-                context.grant_permissions(["geolocation"], origin="https://www.swiggy.com")
-                context.set_geolocation({"latitude": lat_val, "longitude": lon_val})
-                page.wait_for_timeout(2000)
-            except Exception as e:
-                print(f"⚠️ Could not set geolocation: {e}")
-
-            # Navigate to a search page first to establish better session
-            try:
-                search_url = f"https://www.swiggy.com/stores/instamart/search?custom_back=true&query={search_query}"
-                print(f"🔗 Navigating to search page: {search_url}")
-                page.goto(search_url, wait_until="networkidle", timeout=20000)
-                page.wait_for_timeout(2000)
-            except Exception as e:
-                print(f"⚠️ Could not navigate to search page: {e}")
-
-            # Set essential cookies that might be needed (from your curl command)
-            try:
-                print(f"🍪 Setting location cookies...")
-                page.context.add_cookies([
-                    {
-                        "name": "lat",
-                        "value": f"s%3A{lat_val}.VHRw%2BP8XzYg%2BMH900XtRjjjRATsXw13H3UqVXAMvUZ8",
-                        "domain": ".swiggy.com",
-                        "path": "/"
-                    },
-                    {
-                        "name": "lng",
-                        "value": f"s%3A{lon_val}.ZkQBMduicVAJY5V1e%2BmGiJu0%2BHK2pZwQrxpHFI2bnwA",
-                        "domain": ".swiggy.com",
-                        "path": "/"
-                    },
-                    {
-                        "name": "address",
-                        "value": "s%3Afirst%20floor%2C%201568%2C%20Sector%2046%2C%20Huda%20Colony%2C%20Sector%20.JkOQdT2%2BT9x6BNPGiW9DpX72%2B%2BfET8X8CfZy0h74jnI",
-                        "domain": ".swiggy.com",
-                        "path": "/"
-                    }
-                ])
-                page.wait_for_timeout(1000)
-            except Exception as e:
-                print(f"⚠️ Could not set cookies: {e}")
-
-            # Prepare the API call using JavaScript with exact parameters from curl
-            safe_query = json.dumps(search_query)
-            js = f"""
-            (async () => {{
-                try {{
-                    const searchQuery = {safe_query};
-                    const url = 'https://www.swiggy.com/api/instamart/search/v2?offset=0&ageConsent=false&voiceSearchTrackingId=&storeId={store_id}&primaryStoreId={primary_store_id}&secondaryStoreId={secondary_store_id}';
-                    
-                    console.log('Making API call to:', url);
-                    console.log('Search query:', searchQuery);
-                    
-                    const response = await fetch(url, {{
-                        method: 'POST',
-                        headers: {{
-                            'accept': '*/*',
-                            'accept-language': 'en-US,en;q=0.9',
-                            'content-type': 'application/json',
-                            'origin': 'https://www.swiggy.com',
-                            'referer': `https://www.swiggy.com/stores/instamart/search?custom_back=true&query=${{encodeURIComponent(searchQuery)}}`,
-                            'sec-ch-ua': '"Google Chrome";v="141", "Not?A_Brand";v="8", "Chromium";v="141"',
-                            'sec-ch-ua-mobile': '?0',
-                            'sec-ch-ua-platform': '"macOS"',
-                            'sec-fetch-dest': 'empty',
-                            'sec-fetch-mode': 'cors',
-                            'sec-fetch-site': 'same-origin',
-                            'user-agent': navigator.userAgent,
-                            'x-build-version': '2.297.0'
-                        }},
-                        body: JSON.stringify({{
-                            "facets": [],
-                            "sortAttribute": "",
-                            "query": searchQuery,
-                            "search_results_offset": "0",
-                            "page_type": "INSTAMART_AUTO_SUGGEST_PAGE",
-                            "is_pre_search_tag": false
-                        }})
-                    }});
-                    
-                    console.log('Response status:', response.status);
-                    
-                    if (!response.ok) {{
-                        const errorText = await response.text();
-                        console.log('Error response:', errorText);
-                        return {{ 
-                            success: false, 
-                            status: response.status, 
-                            error: 'HTTP ' + response.status, 
-                            text: errorText 
-                        }};
-                    }}
-                    
-                    const data = await response.json();
-                    console.log('Response data keys:', Object.keys(data));
-                    return {{ success: true, status: response.status, data }};
-                    
-                }} catch (err) {{
-                    console.log('JavaScript error:', err);
-                    return {{ success: false, status: 'eval_error', error: err.message }};
-                }}
-            }})();
-            """
-
-            print(f"🔄 Making API call for query: {search_query}")
-            api_response = page.evaluate(js)
-            print(f"📊 API response status: {api_response.get('status')}, success: {api_response.get('success')}")
-            return api_response
-
-        except Exception as e:
-            print(f"❌ Playwright error: {e}")
-            return {"success": False, "error": f"Playwright error: {e}", "status": "playwright_error"}
-        finally:
-            try:
-                context.close()
-                browser.close()
-            except Exception:
-                pass
+    # Prepare the API call using JavaScript with exact parameters from curl
+    safe_query = json.dumps(search_query)
+    js = f"""
+    (async () => {{
+        try {{
+            const searchQuery = {safe_query};
+            const url = 'https://www.swiggy.com/api/instamart/search/v2?offset=0&ageConsent=false&voiceSearchTrackingId=&storeId={store_id}&primaryStoreId={primary_store_id}&secondaryStoreId={secondary_store_id}';
+
+            console.log('Making API call to:', url);
+            console.log('Search query:', searchQuery);
+
+            const response = await fetch(url, {{
+                method: 'POST',
+                headers: {{
+                    'accept': '*/*',
+                    'accept-language': 'en-US,en;q=0.9',
+                    'content-type': 'application/json',
+                    'origin': 'https://www.swiggy.com',
+                    'referer': `https://www.swiggy.com/stores/instamart/search?custom_back=true&query=${{encodeURIComponent(searchQuery)}}`,
+                    'sec-ch-ua': '"Google Chrome";v="141", "Not?A_Brand";v="8", "Chromium";v="141"',
+                    'sec-ch-ua-mobile': '?0',
+                    'sec-ch-ua-platform': '"macOS"',
+                    'sec-fetch-dest': 'empty',
+                    'sec-fetch-mode': 'cors',
+                    'sec-fetch-site': 'same-origin',
+                    'user-agent': navigator.userAgent,
+                    'x-build-version': '2.297.0'
+                }},
+                body: JSON.stringify({{
+                    "facets": [],
+                    "sortAttribute": "",
+                    "query": searchQuery,
+                    "search_results_offset": "0",
+                    "page_type": "INSTAMART_AUTO_SUGGEST_PAGE",
+                    "is_pre_search_tag": false
+                }})
+            }});
+
+            console.log('Response status:', response.status);
+
+            if (!response.ok) {{
+                const errorText = await response.text();
+                console.log('Error response:', errorText);
+                return {{ 
+                    success: false, 
+                    status: response.status, 
+                    error: 'HTTP ' + response.status, 
+                    text: errorText 
+                }};
+            }}
+
+            const data = await response.json();
+            console.log('Response data keys:', Object.keys(data));
+            return {{ success: true, status: response.status, data }};
+
+        }} catch (err) {{
+            console.log('JavaScript error:', err);
+            return {{ success: false, status: 'eval_error', error: err.message }};
+        }}
+    }})();
+    """
+
+    def _search(page):
+        print(f"🔄 Making API call for query: {search_query}")
+        return page.evaluate(js)
+
+    try:
+        api_response = _get_instamart_session().run(_search, timeout=_SEARCH_TIMEOUT)
+    except Exception as e:
+        print(f"❌ Playwright error: {e}")
+        return {"success": False, "error": f"Playwright error: {e}", "status": "playwright_error"}
+    print(f"📊 API response status: {api_response.get('status')}, success: {api_response.get('success')}")
+    return api_response
 
 
 def extract_products_from_instamart_response(api_response: Dict[str, Any]) -> list:
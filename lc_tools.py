@@ -1,8 +1,9 @@
 # lc_tools.py
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from langchain.tools import BaseTool
 import json
-from scraper_real import fetch_prices_for_list_real_sync
+from dataclasses import asdict
+from scraper_real import fetch_prices_for_list_real_sync, PriceResult
 from optimizer import greedy_optimize, ilp_optimize
 
 # db tools (synchronous wrappers)
@@ -24,6 +25,9 @@ class PriceCheckerTool(BaseTool):
         "cache_ttl": 600  # seconds, optional; set to 0 to disable cache
       }
     Output: JSON string mapping store -> { price, available, name, meta }
+
+    Several items can be checked in one call by passing "items": ["milk 1l", "eggs 12"]
+    instead of "item"; the output is then item -> store -> { price, available, name, meta }.
     """
     name: str = "price_checker"
     description: str = "Given an item, location and stores, returns JSON of prices for that item. Checks Supabase cache if configured."
@@ -74,62 +78,92 @@ class PriceCheckerTool(BaseTool):
     def _run(self, query: str) -> str:
         """
         query expected as JSON string: {"item":"milk 1l","location":"Mumbai","stores":["Blinkit"], "cache_ttl":600}
-        Returns JSON string with price_results for the single item (store->info)
+        Returns JSON string with price_results for the single item (store->info),
+        or item->store->info when "items" is given instead of "item"
         """
         obj = json.loads(query)
-        item = obj.get("item")
-        if not item:
+        batch = obj.get("items")
+        if batch is not None and not isinstance(batch, list):
+            return json.dumps({"error": "'items' must be a list of item names"})
+        items = batch if batch else [obj.get("item")] if obj.get("item") else []
+        if not items:
             return json.dumps({"error": "Missing 'item' in request"})
 
-        location = obj.get("location", "mumbai")
-        stores = obj.get("stores", ["Blinkit"])
-        cache_ttl = int(obj.get("cache_ttl", 600))  # default 10 minutes
-        # results container for this item
-        results: Dict[str, Dict[str, Any]] = {}
+        results = self.run_native(
+            items,
+            location=obj.get("location", "mumbai"),
+            stores=obj.get("stores", ["Blinkit"]),
+            cache_ttl=int(obj.get("cache_ttl", 600))  # default 10 minutes
+        )
+        return json.dumps(results if batch else results[items[0]], default=str)
 
-        # 1) check cache per store
-        for store in stores:
-            cached = None
-            try:
-                cached = self._check_cache(item, store, cache_ttl)
-            except Exception:
+    def run_native(self, items: List[str], location: str = "mumbai", stores: Optional[List[str]] = None,
+                   cache_ttl: int = 600) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        In-process entry point for orchestrators: same lookup as _run, but takes and returns
+        plain Python objects (item -> store -> info) with no JSON round-trip.
+        """
+        stores = stores or ["Blinkit"]
+        # results container: item -> store -> info
+        results: Dict[str, Dict[str, Dict[str, Any]]] = {item: {} for item in items}
+
+        # 1) check cache per item/store; uncached items are grouped by the stores they still need
+        to_fetch: Dict[Tuple[str, ...], List[str]] = {}
+        for item in items:
+            for store in stores:
                 cached = None
-
-            if cached:
-                # Normalize cached row fields
-                results[store] = {
-                    "price": cached.get("price"),
-                    "available": cached.get("available", True),
-                    "name": (cached.get("meta") or {}).get("name") or cached.get("meta", {}).get("display_name") or None,
-                    "meta": cached.get("meta") or cached
-                }
-                # skip live fetch for this store
-                continue
-
-            # 2) if not cached, call the live fetcher for this single item/store
-            try:
-                # fetch_prices_for_list_real_sync accepts a list of items and list of stores.
-                # call with single-item list and single-store list to limit work.
-                fetched = fetch_prices_for_list_real_sync([item], location, [store], pincode=None, timeout=30, max_products=5, parallelism=1)
-                # fetched is shaped { item: { store: { ... } } }
-                store_info = (fetched.get(item) or {}).get(store) or {}
-                # store_info may include price, available, name, meta
-                results[store] = {
-                    "price": store_info.get("price"),
-                    "available": store_info.get("available", False),
-                    "name": store_info.get("name"),
-                    "meta": store_info.get("meta") or store_info
-                }
-                # save to cache (best-effort)
                 try:
-                    self._save_cache(item, store, results[store], location)
+                    cached = self._check_cache(item, store, cache_ttl)
                 except Exception:
-                    pass
+                    cached = None
+
+                if cached:
+                    # Normalize cached row fields
+                    results[item][store] = {
+                        "price": cached.get("price"),
+                        "available": cached.get("available", True),
+                        "name": (cached.get("meta") or {}).get("name") or cached.get("meta", {}).get("display_name") or None,
+                        "meta": cached.get("meta") or cached
+                    }
+            missing = tuple(store for store in stores if store not in results[item])
+            if missing:
+                to_fetch.setdefault(missing, []).append(item)
+
+        # 2) one live fetch per group, for just the stores that weren't cached; a failed
+        # fetch only marks its own group's item/store pairs as errors
+        for missing, group in to_fetch.items():
+            try:
+                # 30s per request on every fetch path, however many items are batched
+                fetched = fetch_prices_for_list_real_sync(group, location, list(missing), pincode=None,
+                                                          request_timeout=30, max_products=5)
             except Exception as e:
                 # if fetch fails, include error in meta
-                results[store] = {"price": None, "available": False, "name": None, "meta": {"error": str(e)}}
-
-        return json.dumps(results, default=str)
+                fetched = None
+                error = {"price": None, "available": False, "name": None, "meta": {"error": str(e)}}
+
+            for item in group:
+                for store in missing:
+                    if fetched is None:
+                        results[item][store] = dict(error)
+                        continue
+                    # fetched is shaped { item: { store: { ... } } }
+                    store_info = (fetched.get(item) or {}).get(store) or {}
+                    if isinstance(store_info, PriceResult):
+                        store_info = asdict(store_info)
+                    # store_info may include price, available, name, meta
+                    results[item][store] = {
+                        "price": store_info.get("price"),
+                        "available": store_info.get("available", False),
+                        "name": store_info.get("name"),
+                        "meta": store_info.get("meta") or store_info
+                    }
+                    # save to cache (best-effort)
+                    try:
+                        self._save_cache(item, store, results[item][store], location)
+                    except Exception:
+                        pass
+
+        return results
 
     async def _arun(self, query: str) -> str:
         return self._run(query)
@@ -141,14 +175,20 @@ class OptimizerTool(BaseTool):
 
     def _run(self, query: str) -> str:
         obj = json.loads(query)
-        price_results = obj.get("price_results", {})
-        method = obj.get("method", "greedy")
-        fees = obj.get("delivery_fees", {})
-        if method.lower().startswith("ilp"):
-            assigned = ilp_optimize(price_results, delivery_fees=fees)
-        else:
-            assigned = greedy_optimize(price_results, delivery_fees=fees)
+        assigned = self.run_native(
+            obj.get("price_results", {}),
+            method=obj.get("method", "greedy"),
+            delivery_fees=obj.get("delivery_fees", {})
+        )
         return json.dumps(assigned, default=str)
 
+    def run_native(self, price_results: Dict[str, Any], method: str = "greedy",
+                   delivery_fees: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """In-process entry point: returns {item: (store, price) | None} without JSON encoding"""
+        fees = delivery_fees or {}
+        if method.lower().startswith("ilp"):
+            return ilp_optimize(price_results, delivery_fees=fees)
+        return greedy_optimize(price_results, delivery_fees=fees)
+
     async def _arun(self, query: str) -> str:
         return self._run(query)
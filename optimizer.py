@@ -1,30 +1,84 @@
 # optimizer.py
+import numpy as np
 from pulp import LpProblem, LpMinimize, LpVariable, lpSum, LpBinary
 
+# numba compiles the greedy kernel to native code when installed; plain numpy otherwise
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 def greedy_optimize(price_table, delivery_fees=None, max_stores=None):
     """
     price_table: dict item -> {store: {'price': float, 'available': bool}}
     delivery_fees: dict store -> fee (or 0)
-    returns dict {item: (store, price)}
+    returns dict {item: (store, price)}, None for items with no available price
     """
-    result = {}
-    for item, stores in price_table.items():
-        best = None
-        for s, info in stores.items():
-            if not info['available']:
-                continue
-            if best is None or info['price'] < best[1]:
-                best = (s, info['price'])
-        result[item] = best  # could be None if unavailable
-    return result
+    # One implementation for both entry points: missing 'available' counts as available,
+    # None prices are skipped and ties keep the first store
+    return greedy_optimize_matrix(*price_matrix(price_table))
 
-def ilp_optimize(price_table, delivery_fees=None):
-    # Flatten
+def price_matrix(price_table):
+    """
+    Convert price_table (same shape as greedy_optimize's) into (items, stores, P),
+    where P is an (n_items, n_stores) float64 matrix with NaN for missing/unavailable prices.
+    """
     items = list(price_table.keys())
-    stores = set()
-    for it in items:
-        stores.update(price_table[it].keys())
-    stores = list(stores)
+    stores = list(dict.fromkeys(s for it in items for s in price_table[it]))
+    col = {s: j for j, s in enumerate(stores)}
+    P = np.full((len(items), len(stores)), np.nan)
+    for i, it in enumerate(items):
+        for s, info in price_table[it].items():
+            if info.get('available', True) and info.get('price') is not None:
+                P[i, col[s]] = info['price']
+    return items, stores, P
+
+def _greedy_loop(P):
+    # Cheapest store per row, -1 where every price is NaN; ties keep the first store
+    assign = np.full(P.shape[0], -1, np.int64)
+    for i in range(P.shape[0]):
+        best = np.inf
+        for j in range(P.shape[1]):
+            if P[i, j] < best:  # NaN compares False, so missing prices are skipped
+                best = P[i, j]
+                assign[i] = j
+    return assign
+
+def _greedy_numpy(P):
+    # Same result as _greedy_loop, vectorized (argmin also keeps the first store on ties)
+    missing = np.isnan(P)
+    if P.shape[1] == 0:
+        return np.full(P.shape[0], -1, np.int64)
+    return np.where(missing.all(1), -1, np.argmin(np.where(missing, np.inf, P), 1))
+
+if njit is not None:
+    # nogil lets other threads (e.g. Streamlit's) keep running while the kernel does
+    _greedy_kernel = njit(cache=True, nogil=True)(_greedy_loop)
+else:
+    # A scalar Python loop would be slower than the dict walk; numpy is what's always installed
+    _greedy_kernel = _greedy_numpy
+
+def greedy_optimize_matrix(items, stores, P):
+    """greedy_optimize over the arrays from price_matrix(); returns {item: (store, price)}"""
+    assign = _greedy_kernel(P)
+    return {
+        it: (stores[j], float(P[i, j])) if j >= 0 else None
+        for i, (it, j) in enumerate(zip(items, assign.tolist()))
+    }
+
+def ilp_optimize(price_table, delivery_fees=None):
+    # Only available, priced offers go into the model; items with none are unavailable
+    # up front, so the solver never sees them (or stores that offer nothing)
+    offers = {
+        it: {s: info['price'] for s, info in stores.items()
+             if info.get('available', True) and info.get('price') is not None}
+        for it, stores in price_table.items()
+    }
+    result = {it: None for it, prices in offers.items() if not prices}
+    items = [it for it, prices in offers.items() if prices]
+    if not items:
+        return result
+    stores = list(dict.fromkeys(s for it in items for s in offers[it]))
     if delivery_fees is None:
         delivery_fees = {s:0 for s in stores}
 
@@ -40,7 +94,7 @@ def ilp_optimize(price_table, delivery_fees=None):
 
     # objective: sum prices*x + sum delivery*y
     prob += lpSum([
-        (price_table[i][s]['price'] if price_table[i][s]['available'] else 1e6) * x[(i,s)]
+        offers[i].get(s, 1e6) * x[(i,s)]
         for i in items for s in stores
     ]) + lpSum([delivery_fees.get(s,0)*y[s] for s in stores])
 
@@ -54,9 +108,8 @@ def ilp_optimize(price_table, delivery_fees=None):
             prob += x[(i,s)] <= y[s]
 
     prob.solve()
-    result = {}
     for i in items:
         for s in stores:
             if x[(i,s)].value() == 1.0:
-                result[i] = (s, price_table[i][s]['price'])
-    return result
+                result[i] = (s, offers[i][s])
+    return {it: result.get(it) for it in price_table}
@@ -0,0 +1,123 @@
+# playwright_session.py - Long-lived sync Playwright browser shared across API calls
+import atexit
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from playwright.sync_api import sync_playwright
+
+# Queued in place of a task: close the browser and keep serving / close it and exit
+_CLOSE = "close"
+_RETIRE = "retire"
+
+
+class PlaywrightSession:
+    """
+    Keeps one Chromium browser, context and warmed-up page alive between calls.
+    Sync Playwright objects only work on the thread that created them, so all work
+    runs on a dedicated daemon thread; callers pass a function to run(page) instead.
+    """
+
+    def __init__(self, name: str, warm_up: Callable[[Any], None]):
+        self._name = name
+        self._warm_up = warm_up
+        self._lock = threading.Lock()
+        self._tasks: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_worker()
+        atexit.register(self.close)
+
+    def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """
+        Run fn(page, *args) on the session thread, starting the browser on first use.
+        If it doesn't finish within timeout seconds, the stuck worker is abandoned and a
+        fresh browser serves later calls, instead of every call queueing behind it.
+        """
+        future: Future = Future()
+        with self._lock:
+            tasks = self._tasks
+            tasks.put((fn, args, future))
+        try:
+            return future.result(timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            self._restart(tasks)
+            raise
+
+    def close(self):
+        """Close the browser; the next run() starts a fresh one"""
+        with self._lock:
+            if not self._thread.is_alive():
+                return
+            future: Future = Future()
+            self._tasks.put((_CLOSE, (), future))
+        future.result(timeout=30)
+
+    def _start_worker(self):
+        self._tasks = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, args=(self._tasks,), name=self._name, daemon=True)
+        self._thread.start()
+
+    def _restart(self, stuck_tasks: "queue.Queue"):
+        with self._lock:
+            if self._tasks is not stuck_tasks:
+                return  # another caller already replaced this worker
+            self._start_worker()
+            # Hand the calls still waiting behind the stuck one to the new worker
+            while True:
+                try:
+                    self._tasks.put(stuck_tasks.get_nowait())
+                except queue.Empty:
+                    break
+            # The old worker closes its browser and exits if its task ever returns
+            stuck_tasks.put((_RETIRE, (), None))
+
+    def _worker(self, tasks: "queue.Queue"):
+        state: Dict[str, Any] = {}
+        while True:
+            fn, args, future = tasks.get()
+            if fn == _RETIRE:
+                self._shutdown(state)
+                return
+            if fn == _CLOSE:
+                self._shutdown(state)
+                future.set_result(None)
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue  # the caller already gave up on it
+            try:
+                future.set_result(fn(self._ensure_page(state), *args))
+            except BaseException as e:
+                # A crashed page or browser is restarted on the next call
+                self._shutdown(state)
+                future.set_exception(e)
+
+    def _ensure_page(self, state: Dict[str, Any]):
+        if state.get("page") is None:
+            state["playwright"] = sync_playwright().start()
+            state["browser"] = state["playwright"].chromium.launch(
+                headless=True,
+                args=[
+                    "--no-sandbox",
+                    "--disable-dev-shm-usage",
+                    "--disable-blink-features=AutomationControlled"
+                ]
+            )
+            context = state["browser"].new_context(
+                viewport={"width": 1920, "height": 1080},
+                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
+                extra_http_headers={"accept-language": "en-US,en;q=0.9"}
+            )
+            page = context.new_page()
+            self._warm_up(page)
+            state["page"] = page
+        return state["page"]
+
+    def _shutdown(self, state: Dict[str, Any]):
+        for close in (lambda: state["browser"].close(), lambda: state["playwright"].stop()):
+            try:
+                close()
+            except Exception:
+                pass
+        state.clear()
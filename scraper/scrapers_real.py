@@ -1,19 +1,187 @@
 # scrapers.py - Playwright implementation for reliable grocery price scraping
 import asyncio
+import atexit
+import os
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 import re
 import json
+import math
 import time
 from typing import Dict, List, Optional, Tuple
 import logging
 from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor
-import random
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import threading
+from urllib.parse import quote_plus
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Set GROCERY_DEBUG=1 to log the HTML of the first few product cards
+_GROCERY_DEBUG = os.getenv("GROCERY_DEBUG") == "1"
+
+# Price parsing helpers, built once at import
+_PRICE_RE = re.compile(r'[\d,]+\.?\d*')
+_PRICE_STRIP = str.maketrans('', '', '₹,')
+
+# Tracking/analytics URL patterns to block. Registered as individual route globs
+# so Playwright matches them in the browser and only calls back into Python for
+# requests that are actually being aborted.
+_BLOCKED_URL_PATTERNS = [
+    "**://*googletagmanager.com/**",
+    "**://*google-analytics.com/**",
+    "**://*facebook.com/tr*",
+    "**://*doubleclick.net/**",
+    "**://*amazon-adsystem.com/**",
+    "**://*googlesyndication.com/**"
+]
+
+# Browser-side Blinkit location setup. Detects which location UI variant is
+# present, fills the input through the native value setter (so React sees the
+# change) and picks the first suggestion - all in a single page.evaluate call.
+_BLINKIT_LOCATION_JS = """
+async ([location, inputSelectors, openerSelectors, suggestionSelectors]) => {
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const isVisible = (el) => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+    const query = (selectors) => {
+        for (const selector of selectors) {
+            try {
+                const el = document.querySelector(selector);
+                if (isVisible(el) && !el.disabled) return el;
+            } catch (e) {}
+        }
+        return null;
+    };
+
+    let input = query(inputSelectors);
+    if (!input) {
+        // Alternative UI: a location button has to be clicked to reveal the input
+        const opener = query(openerSelectors);
+        if (!opener) return false;
+        opener.click();
+        await sleep(2000);
+        input = query(inputSelectors);
+    }
+    if (!input) return false;
+
+    const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    input.focus();
+    setValue.call(input, location);
+    input.dispatchEvent(new Event('input', { bubbles: true }));
+    input.dispatchEvent(new Event('change', { bubbles: true }));
+
+    // Wait for suggestions to load and click the first one
+    for (let i = 0; i < 10; i++) {
+        await sleep(500);
+        const suggestion = query(suggestionSelectors);
+        if (suggestion) {
+            suggestion.click();
+            return true;
+        }
+    }
+
+    // Fall back to keyboard selection of the first suggestion
+    for (const key of ['ArrowDown', 'Enter']) {
+        input.dispatchEvent(new KeyboardEvent('keydown', { key, bubbles: true }));
+        input.dispatchEvent(new KeyboardEvent('keyup', { key, bubbles: true }));
+        await sleep(300);
+    }
+    return true;
+}
+"""
+
+# Per-product fields read from each product card
+_PRODUCT_FIELDS = ("product_name", "product_price", "product_mrp", "product_quantity")
+
+# Browser-side product extraction. Mirrors the per-element Python helpers
+# (first matching selector with non-trivial text wins) but runs over all product
+# cards in one evaluate_all call instead of several round-trips per field.
+_EXTRACT_PRODUCTS_JS = """
+(elements, { selectors, out_of_stock, limit, debug_html }) => {
+    const textOf = (root, selectorList) => {
+        if (!selectorList) return '';
+        for (const selector of selectorList) {
+            let nodes;
+            try {
+                nodes = root.querySelectorAll(selector);
+            } catch (e) {
+                continue;
+            }
+            for (const node of nodes) {
+                const text = (node.innerText || '').trim();
+                if (text.length > 1) return text;
+            }
+        }
+        return '';
+    };
+    const textWithRupee = (root) => {
+        for (const node of root.querySelectorAll('*')) {
+            const text = (node.innerText || '').trim();
+            if (text.length > 1 && text.includes('₹')) return text;
+        }
+        return '';
+    };
+    const productHref = (root) => {
+        for (const link of root.querySelectorAll('a[href]')) {
+            const href = link.getAttribute('href');
+            if (href && (href.includes('/product') || href.includes('/item') || href.length > 10)) return href;
+        }
+        return null;
+    };
+
+    const rows = elements.slice(0, limit).map((el, i) => {
+        let name = textOf(el, selectors.product_name);
+        if (!name) name = textOf(el, ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', '.title', '.name']);
+
+        let priceText = textOf(el, selectors.product_price);
+        if (!priceText) priceText = textWithRupee(el) || textOf(el, ["[class*='price']", "[class*='Price']", "[class*='amount']"]);
+
+        let outOfStock = false;
+        try {
+            outOfStock = !!(out_of_stock && el.querySelector(out_of_stock));
+        } catch (e) {}
+
+        return {
+            name,
+            price_text: priceText,
+            mrp_text: textOf(el, selectors.product_mrp),
+            quantity: textOf(el, selectors.product_quantity),
+            out_of_stock: outOfStock,
+            href: productHref(el),
+            html: i < debug_html ? el.innerHTML.slice(0, 200) : null
+        };
+    });
+    return { total: elements.length, rows };
+}
+"""
+
+_BLINKIT_LOCATION_INPUTS = [
+    "input[placeholder*='location']",
+    "input[placeholder*='delivery']",
+    "input[data-testid*='location']",
+    "input[class*='location']",
+    "input[class*='address']",
+    ".location-input input",
+    "[data-testid='location-input']"
+]
+
+_BLINKIT_LOCATION_OPENERS = [
+    ".location-button",
+    "[data-testid='location-button']",
+    "[data-testid*='change-location']",
+    ".address-selector"
+]
+
+_BLINKIT_LOCATION_SUGGESTIONS = [
+    ".suggestions li:first-child",
+    ".dropdown-item:first-child",
+    "[data-testid*='suggestion']:first-child",
+    ".suggestion:first-child",
+    ".location-suggestion:first-child",
+    "[role='option']:first-child"
+]
+
 
 @dataclass
 class ProductData:
@@ -29,18 +197,143 @@ class ProductData:
     image_url: Optional[str] = None
 
 
+_API_NAME_KEYS = ("name", "product_name", "display_name", "title")
+_API_PRICE_KEYS = ("price", "offer_price", "selling_price", "final_price")
+_API_MRP_KEYS = ("mrp", "original_price", "marked_price")
+_API_QUANTITY_KEYS = ("unit", "quantity", "weight", "pack_size")
+
+
+# Browser context geolocation; the search API wants the same coordinates as headers
+_DEFAULT_GEO = {"latitude": 19.0760, "longitude": 72.8777}
+
+# City coordinates for the search API's lat/lon headers (same table as scraper_real.py)
+_CITY_GEO = {
+    "mumbai": (19.0760, 72.8777),
+    "delhi": (28.7041, 77.1025),
+    "bangalore": (12.9716, 77.5946),
+    "hyderabad": (17.3850, 78.4867),
+    "chennai": (13.0827, 80.2707),
+    "kolkata": (22.5726, 88.3639),
+    "pune": (18.5204, 73.8567),
+    "gurgaon": (28.4595, 77.0266)
+}
+
+
+def _blinkit_search_request(search_term: str, location: str) -> Optional[Tuple[Dict, Dict[str, str]]]:
+    """
+    (JSON body, headers) for Blinkit's search POST, matching blinkit_playwright_api.py.
+    None when the location has no known coordinates, so the caller renders the page instead.
+    """
+    coords = _CITY_GEO.get((location or "").strip().lower())
+    if coords is None:
+        return None
+    body = {
+        "applied_filters": None,
+        "monet_assets": [{"name": "ads_vertical_banner", "processed": 0, "total": 0}],
+        "postback_meta": {"processedGroupIds": [], "pageMeta": {"scrollMeta": [{"entitiesCount": 95}]}},
+        "previous_search_query": search_term,
+        "processed_rails": {},
+        "vertical_cards_processed": 12,
+    }
+    headers = {
+        "accept": "*/*",
+        "access_token": "null",
+        "app_client": "consumer_web",
+        "app_version": "1010101010",
+        "content-type": "application/json",
+        "origin": "https://blinkit.com",
+        "referer": f"https://blinkit.com/s/?q={quote_plus(search_term)}",
+        "lat": str(coords[0]),
+        "lon": str(coords[1]),
+    }
+    return body, headers
+
+
+def _first_value(node: Dict, keys: Tuple[str, ...]):
+    """Return the first non-empty scalar value among keys in node"""
+    for key in keys:
+        value = node.get(key)
+        if value not in (None, "") and not isinstance(value, (dict, list)):
+            return value
+    return None
+
+
+def _parse_search_api_products(data, limit: int = 15) -> List[Dict]:
+    """
+    Heuristically pull product rows out of a store's search JSON response.
+    Any object carrying both a name and a price key is taken as a product.
+    """
+    rows = []
+    stack = [data]
+    while stack and len(rows) < limit:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        name = _first_value(node, _API_NAME_KEYS)
+        price = _first_value(node, _API_PRICE_KEYS)
+        if isinstance(name, str) and price is not None:
+            sold_out = node.get("is_sold_out") or node.get("out_of_stock") or node.get("inventory") == 0
+            mrp = _first_value(node, _API_MRP_KEYS)
+            quantity = _first_value(node, _API_QUANTITY_KEYS)
+            rows.append({
+                "name": name,
+                "price_text": str(price),
+                "mrp_text": str(mrp) if mrp is not None else None,
+                "quantity": str(quantity) if quantity is not None else None,
+                "out_of_stock": bool(sold_out),
+                "href": node.get("url") or node.get("product_url"),
+            })
+            continue
+
+        stack.extend(reversed(list(node.values())))
+    return rows
+
+
+def _to_product_data(row: Dict, store: str, search_term: str) -> ProductData:
+    """Convert a scraped product row into a ProductData"""
+    return ProductData(
+        name=row["name"],
+        price=row["price"],
+        mrp=row["mrp"],
+        quantity=row["quantity"],
+        available=row["available"],
+        store=store,
+        search_term=search_term,
+        product_url=row["url"]
+    )
+
+
 class PlaywrightGroceryScraper:
     """Advanced grocery price scraper using Playwright"""
 
     def __init__(self):
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
+        # Location is sticky to the browser context (cookies/localStorage), so
+        # remember which location each store was set up with
+        self._location_set: Dict[str, str] = {}
+        # IDF-style word weights learned from every product name seen so far,
+        # so rare words (brands, variants) outweigh common ones like "1l"
+        self._token_df: Dict[str, int] = {}
+        self._names_seen = 0
+        # Per-store delay before each scrape: grows when a store errors or throttles us,
+        # shrinks while it behaves
+        self._store_backoff: Dict[str, float] = {}
+        self._store_throttled: set = set()
 
         # Store configurations with updated selectors based on current website structures
         self.store_configs = {
             "Blinkit": {
                 "base_url": "https://blinkit.com",
                 "search_url": "https://blinkit.com/s/?q={query}",
+                # Optional JSON search endpoint, tried before rendering the search page
+                "api_url": "https://blinkit.com/v1/layout/search?q={q}&search_type=type_to_search",
+                "api_request": _blinkit_search_request,
+                "api_parser": _parse_search_api_products,
                 "selectors": {
                     "location_input": "input[placeholder*='search delivery location'], input[placeholder*='delivery'], input[placeholder*='location'], input[data-testid*='location']",
                     "location_suggestions": "div:has-text('Mumbai Central'), div:has-text('Mumbai'), div[class*='suggestion'], li[role='option']",
@@ -87,6 +380,13 @@ class PlaywrightGroceryScraper:
             }
         }
 
+        # Split the product selectors once into tuples so lookups don't re-split them per call
+        for config in self.store_configs.values():
+            config["_compiled_selectors"] = {
+                field: tuple(s.strip() for s in config["selectors"].get(field, "").split(",") if s.strip())
+                for field in ("products",) + _PRODUCT_FIELDS
+            }
+
     async def __aenter__(self):
         """Async context manager entry"""
         await self.initialize_browser()
@@ -96,6 +396,11 @@ class PlaywrightGroceryScraper:
         """Async context manager exit"""
         await self.close()
 
+    async def ensure_started(self):
+        """Start the browser if it isn't running yet"""
+        if self.context is None:
+            await self.initialize_browser()
+
     async def initialize_browser(self):
         """Initialize Playwright browser with stealth settings to avoid detection"""
         self.playwright = await async_playwright().start()
@@ -127,7 +432,7 @@ class PlaywrightGroceryScraper:
             user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             locale="en-IN",
             timezone_id="Asia/Kolkata",
-            geolocation={"latitude": 19.0760, "longitude": 72.8777},
+            geolocation=_DEFAULT_GEO,
             permissions=["geolocation"],
             extra_http_headers={
                 "Accept-Language": "en-US,en;q=0.9,hi;q=0.8",
@@ -162,34 +467,34 @@ class PlaywrightGroceryScraper:
         """)
 
         # Less aggressive resource blocking - only block tracking/analytics
-        await self.context.route("**/*", self._handle_route_minimal)
-
-    async def _handle_route_minimal(self, route, request):
-        """Minimal request handling - only block tracking/analytics, not essential resources"""
-        # Only block tracking and analytics to avoid breaking the page
-        blocked_domains = [
-            "googletagmanager.com",
-            "google-analytics.com",
-            "facebook.com/tr",
-            "doubleclick.net",
-            "amazon-adsystem.com",
-            "googlesyndication.com"
-        ]
+        for pattern in _BLOCKED_URL_PATTERNS:
+            await self.context.route(pattern, self._abort_route)
 
-        # Block only specific tracking resources
-        if any(domain in request.url for domain in blocked_domains):
-            await route.abort()
-        else:
-            await route.continue_()
+    async def _abort_route(self, route):
+        """Abort a blocked tracking/analytics request"""
+        await route.abort()
 
     async def scrape_store_products(self, store_name: str, search_term: str, location: str = "Mumbai") -> List[ProductData]:
         """Scrape products with enhanced error handling and retries"""
+        rows = await self._scrape_store_rows(store_name, search_term, location)
+        return [_to_product_data(row, store_name, search_term) for row in rows]
+
+    async def _scrape_store_rows(self, store_name: str, search_term: str, location: str = "Mumbai") -> List[Dict]:
+        """Scrape products as plain dict rows (see _build_product_row for the keys)"""
 
         if store_name not in self.store_configs:
             logger.error(f"Store {store_name} not configured")
             return []
 
         config = self.store_configs[store_name]
+
+        # Hit the store's JSON search API directly once the location cookies are in place
+        if config.get("api_url") and self._location_set.get(store_name) == location:
+            products = await self._fetch_api_rows(store_name, search_term, location, config)
+            if products:
+                logger.info(f"Fetched {len(products)} products from {store_name} search API")
+                return products
+
         products = []
         max_retries = 2
 
@@ -205,14 +510,14 @@ class PlaywrightGroceryScraper:
                 page.on("console", lambda msg: logger.info(f"Console {store_name}: {msg.text}"))
 
                 # Add connection error handling
-                page.on("response", lambda response: logger.warning(f"Failed response {store_name}: {response.status}") if response.status >= 400 else None)
+                page.on("response", lambda response: self._on_response(store_name, response))
 
                 await self._setup_store_location(page, store_name, location, config)
                 await self._perform_search(page, search_term, config)
                 await self._wait_for_products(page, config)
 
                 if store_name == "Instamart":
-                    await self._handle_infinite_scroll(page, config)
+                    await self._load_enough_products(page, config)
 
                 products = await self._extract_products(page, search_term, store_name, config)
 
@@ -236,8 +541,63 @@ class PlaywrightGroceryScraper:
         logger.info(f"Successfully scraped {len(products)} products from {store_name}")
         return products
 
+    def _on_response(self, store_name: str, response):
+        """Log failed responses and note when the store is refusing or rate limiting us"""
+        if response.status < 400:
+            return
+        logger.warning(f"Failed response {store_name}: {response.status}")
+        if response.status in (403, 429) and response.request.resource_type in ("document", "xhr", "fetch"):
+            self._store_throttled.add(store_name)
+
+    def _update_backoff(self, store_name: str, ok: bool):
+        """Double the store's delay after an error (max 8s), ease it off after a success (min 0.1s)"""
+        delay = self._store_backoff.get(store_name, 0.3)
+        if ok and store_name not in self._store_throttled:
+            delay = max(delay * 0.8, 0.1)
+        else:
+            delay = min(delay * 2, 8.0)
+        self._store_throttled.discard(store_name)
+        self._store_backoff[store_name] = delay
+
+    async def _fetch_api_rows(self, store_name: str, search_term: str, location: str, config: dict) -> List[Dict]:
+        """Fetch product rows from the store's search API, or [] so the caller renders the page"""
+        url = config["api_url"].format(q=quote_plus(search_term), loc=quote_plus(location))
+        try:
+            # context.request shares the browser context's cookies (location, session);
+            # stores that need a POST body and headers provide an api_request builder
+            if config.get("api_request"):
+                request = config["api_request"](search_term, location)
+                if request is None:
+                    logger.info(f"No {store_name} search API coordinates for {location}, falling back to page render")
+                    return []
+                body, headers = request
+                response = await self.context.request.post(url, data=json.dumps(body), headers=headers, timeout=15000)
+            else:
+                response = await self.context.request.get(url, timeout=15000)
+            if response.status != 200:
+                logger.info(f"{store_name} search API returned {response.status}, falling back to page render")
+                return []
+            data = await response.json()
+        except Exception as e:
+            logger.info(f"{store_name} search API failed ({e}), falling back to page render")
+            return []
+
+        rows = []
+        for index, raw in enumerate(config["api_parser"](data)):
+            row = self._build_product_row(
+                index, raw["name"], raw["price_text"], raw["mrp_text"], raw["quantity"],
+                not raw["out_of_stock"], self._normalize_product_url(raw["href"], store_name), store_name
+            )
+            if row:
+                rows.append(row)
+        return rows
+
     async def _setup_store_location(self, page: Page, store_name: str, location: str, config: dict):
         """Enhanced location setup with better Blinkit handling"""
+        if self._location_set.get(store_name) == location:
+            logger.info(f"Location already set for {store_name}: {location}")
+            return
+
         try:
             logger.info(f"Navigating to {store_name} base URL: {config['base_url']}")
             await page.goto(config["base_url"], wait_until="domcontentloaded", timeout=60000)
@@ -249,14 +609,19 @@ class PlaywrightGroceryScraper:
             location_selector = config["selectors"].get("location_input")
             
             if store_name == "Blinkit":
-                await self._handle_blinkit_location(page, location, location_selector)
+                location_ok = await self._handle_blinkit_location(page, location, location_selector)
             elif store_name == "Instamart":
-                await self._handle_instamart_location(page, location, config)
+                location_ok = await self._handle_instamart_location(page, location, config)
             elif store_name == "Zepto":
-                await self._handle_zepto_location(page, location, config)
+                location_ok = await self._handle_zepto_location(page, location, config)
             else:
                 logger.info(f"No specific location handling for {store_name}")
-                
+                location_ok = True
+
+            # Only a location that actually took is remembered; a failed one is retried on the next page
+            if location_ok:
+                self._location_set[store_name] = location
+
         except Exception as e:
             logger.error(f"Failed to setup {store_name}: {e}")
             raise
@@ -282,25 +647,41 @@ class PlaywrightGroceryScraper:
             except:
                 continue
 
-    async def _handle_blinkit_location(self, page: Page, location: str, location_selector: str):
-        """Enhanced Blinkit location handling with multiple strategies"""
+    async def _handle_blinkit_location(self, page: Page, location: str, location_selector: str) -> bool:
+        """Enhanced Blinkit location handling with multiple strategies; returns whether one worked"""
         logger.info("Starting Blinkit location setup")
-        
+
+        # Fast path: detect the UI variant and set the location in one round-trip
+        try:
+            input_selectors = [location_selector] if location_selector else []
+            input_selectors += _BLINKIT_LOCATION_INPUTS
+            if await page.evaluate(_BLINKIT_LOCATION_JS, [location, input_selectors, _BLINKIT_LOCATION_OPENERS, _BLINKIT_LOCATION_SUGGESTIONS]):
+                logger.info("Blinkit location set via in-page probe")
+                await asyncio.sleep(2)
+                return True
+            logger.info("In-page location probe found no known UI, trying strategies")
+        except Exception as e:
+            logger.warning(f"Blinkit in-page location probe failed: {e}")
+
         try:
             # Strategy 1: Wait for and interact with location input
             await self._blinkit_location_strategy_1(page, location, location_selector)
+            return True
         except Exception as e1:
             logger.warning(f"Blinkit Strategy 1 failed: {e1}")
             try:
                 # Strategy 2: Alternative selectors and approach
                 await self._blinkit_location_strategy_2(page, location)
+                return True
             except Exception as e2:
                 logger.warning(f"Blinkit Strategy 2 failed: {e2}")
                 try:
                     # Strategy 3: Direct URL approach
                     await self._blinkit_location_strategy_3(page, location)
+                    return True
                 except Exception as e3:
                     logger.error(f"All Blinkit location strategies failed: {e3}")
+                    return False
 
     async def _blinkit_location_strategy_1(self, page: Page, location: str, location_selector: str):
         """Primary strategy: Standard location input handling"""
@@ -484,14 +865,14 @@ class PlaywrightGroceryScraper:
         
         raise Exception("Strategy 3 failed - URL approach unsuccessful")
 
-    async def _handle_instamart_location(self, page: Page, location: str, config: dict):
-        """Enhanced Instamart location handling"""
+    async def _handle_instamart_location(self, page: Page, location: str, config: dict) -> bool:
+        """Enhanced Instamart location handling; returns whether the location was set (or needs no setting)"""
         logger.info("Setting up Instamart location")
         location_selector = config["selectors"].get("location_input")
         
         if not location_selector:
             logger.info("No location selector for Instamart")
-            return
+            return True
         
         try:
             await page.wait_for_selector(location_selector, state="visible", timeout=15000)
@@ -513,18 +894,20 @@ class PlaywrightGroceryScraper:
                     logger.info("Submit button not needed or not found")
                     
             logger.info("Instamart location setup completed")
+            return True
             
         except Exception as e:
             logger.warning(f"Instamart location setup failed: {e}")
+            return False
 
-    async def _handle_zepto_location(self, page: Page, location: str, config: dict):
-        """Enhanced Zepto location handling"""
+    async def _handle_zepto_location(self, page: Page, location: str, config: dict) -> bool:
+        """Enhanced Zepto location handling; returns whether the location was set (or needs no setting)"""
         logger.info("Setting up Zepto location")
         location_selector = config["selectors"].get("location_input")
         
         if not location_selector:
             logger.info("No location selector for Zepto")
-            return
+            return True
         
         try:
             await page.wait_for_selector(location_selector, state="visible", timeout=15000)
@@ -537,15 +920,21 @@ class PlaywrightGroceryScraper:
             await asyncio.sleep(2)
             
             logger.info("Zepto location setup completed")
+            return True
             
         except Exception as e:
             logger.warning(f"Zepto location setup failed: {e}")
+            return False
 
     async def _debug_blinkit_page_state(self, page: Page, stage: str):
         """Debug helper to understand page state"""
         try:
-            # Take screenshot
-            await page.screenshot(path=f"debug_blinkit_{stage}_{int(time.time())}.png")
+            # Take screenshot only when debugging - encoding and transfer aren't free
+            if logger.isEnabledFor(logging.DEBUG):
+                await page.screenshot(
+                    path=f"debug_blinkit_{stage}_{int(time.time())}.jpg",
+                    type="jpeg", quality=60, full_page=False
+                )
             
             # Log current URL
             current_url = page.url
@@ -602,7 +991,7 @@ class PlaywrightGroceryScraper:
         logger.info(f"Waiting for products with selectors: {product_selector}")
 
         # Try each selector individually and log results
-        selectors = [s.strip() for s in product_selector.split(", ")]
+        selectors = config["_compiled_selectors"]["products"]
 
         found_products = False
         working_selector = None
@@ -624,6 +1013,7 @@ class PlaywrightGroceryScraper:
         if found_products:
             # Update the config with working selector for this session
             config["selectors"]["products"] = working_selector
+            config["_compiled_selectors"]["products"] = (working_selector,)
             logger.info(f"Using working selector: {working_selector}")
 
             # Wait for content to stabilize
@@ -633,66 +1023,84 @@ class PlaywrightGroceryScraper:
             logger.warning("No product elements found with any selector")
 
             # Take a screenshot for debugging
-            try:
-                await page.screenshot(path=f"debug_no_products_{int(time.time())}.png")
-                logger.info("Debug screenshot saved")
-            except:
-                pass
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    await page.screenshot(
+                        path=f"debug_no_products_{int(time.time())}.jpg",
+                        type="jpeg", quality=60, full_page=False
+                    )
+                    logger.debug("Debug screenshot saved")
+                except:
+                    pass
 
-    async def _handle_infinite_scroll(self, page: Page, config: dict):
-        """Handle infinite scroll for Instamart"""
+    async def _load_enough_products(self, page: Page, config: dict):
+        """Scroll just far enough for lazy loading to render the 15 products we extract"""
         try:
-            scroll_selector = config["selectors"].get("infinite_scroll")
-            if not scroll_selector:
-                return
-
-            max_scrolls = 5
-            scroll_count = 0
-
-            while scroll_count < max_scrolls:
-                # Check for load more elements
-                load_more_elements = await page.locator(scroll_selector).all()
+            await page.locator(config["selectors"]["products"]).nth(14).scroll_into_view_if_needed(timeout=5000)
+        except Exception as e:
+            # Fewer than 15 results, or they are all rendered already
+            logger.info(f"Targeted scroll skipped: {e}")
 
-                if not load_more_elements:
-                    break
+    async def _extract_products(self, page: Page, search_term: str, store_name: str, config: dict) -> List[Dict]:
+        """Extract product data with enhanced fallback logic"""
+        products = []
 
-                # Scroll the load more element into view
-                try:
-                    await load_more_elements[0].scroll_into_view_if_needed()
-                    await asyncio.sleep(2)
+        try:
+            # Pull every field for the first 15 products in a single in-page pass
+            result = await page.locator(config["selectors"]["products"]).evaluate_all(
+                _EXTRACT_PRODUCTS_JS,
+                {
+                    "selectors": config["_compiled_selectors"],
+                    "out_of_stock": config["selectors"].get("out_of_stock", ""),
+                    "limit": 15,
+                    "debug_html": 3 if _GROCERY_DEBUG else 0
+                }
+            )
+        except Exception as e:
+            logger.warning(f"Batch extraction failed for {store_name}, falling back to per-element extraction: {e}")
+            return await self._extract_products_per_element(page, search_term, store_name, config)
 
-                    # Check if more products loaded
-                    new_load_more = await page.locator(scroll_selector).all()
-                    if len(new_load_more) == len(load_more_elements):
-                        break
+        rows = result.get("rows", [])
+        logger.info(f"Found {result.get('total', 0)} product elements in {store_name}")
 
-                except Exception as e:
-                    logger.info(f"Scroll handling completed: {e}")
-                    break
+        # Debug: log HTML of first 3 product elements
+        for row in rows:
+            if row.get("html"):
+                logger.info(f"Product HTML: {row['html']}")
 
-                scroll_count += 1
+        if not rows:
+            logger.warning(f"No product elements found in {store_name}")
+            return products
 
-            logger.info(f"Completed {scroll_count} scroll operations")
+        for i, row in enumerate(rows):
+            try:
+                product = self._build_product_row(
+                    i,
+                    row.get("name"),
+                    row.get("price_text"),
+                    row.get("mrp_text"),
+                    row.get("quantity"),
+                    not row.get("out_of_stock"),
+                    self._normalize_product_url(row.get("href"), store_name),
+                    store_name
+                )
+                if product:
+                    products.append(product)
+            except Exception as e:
+                logger.warning(f"Failed to extract product {i} from {store_name}: {e}")
+                continue
 
-        except Exception as e:
-            logger.warning(f"Infinite scroll handling failed: {e}")
+        logger.info("Extracted %d products from %s", len(products), store_name)
+        return products
 
-    async def _extract_products(self, page: Page, search_term: str, store_name: str, config: dict) -> List[ProductData]:
-        """Extract product data with enhanced fallback logic"""
+    async def _extract_products_per_element(self, page: Page, search_term: str, store_name: str, config: dict) -> List[Dict]:
+        """Per-element extraction, used when the batched in-page extraction fails"""
         products = []
 
         try:
             # Get all product elements
             product_elements = await page.locator(config["selectors"]["products"]).all()
             logger.info(f"Found {len(product_elements)} product elements in {store_name}")
-            
-            # Debug: log HTML of first 3 product elements
-            for el in product_elements[:3]:
-                try:
-                    html = await el.inner_html()
-                    logger.info(f"Product HTML: {html[:200]}")
-                except Exception as e:
-                    logger.warning(f"Failed to get product HTML: {e}")
 
             if len(product_elements) == 0:
                 logger.warning(f"No product elements found in {store_name}")
@@ -702,10 +1110,10 @@ class PlaywrightGroceryScraper:
             for i, element in enumerate(product_elements[:15]):
                 try:
                     # Extract product data using enhanced helper methods
-                    name = await self._extract_text_from_element_enhanced(element, config["selectors"].get("product_name", ""), store_name)
-                    price_text = await self._extract_text_from_element_enhanced(element, config["selectors"].get("product_price", ""), store_name)
-                    mrp_text = await self._extract_text_from_element_enhanced(element, config["selectors"].get("product_mrp", ""), store_name)
-                    quantity = await self._extract_text_from_element_enhanced(element, config["selectors"].get("product_quantity", ""), store_name)
+                    name = await self._extract_text_from_element_enhanced(element, config["_compiled_selectors"]["product_name"], store_name)
+                    price_text = await self._extract_text_from_element_enhanced(element, config["_compiled_selectors"]["product_price"], store_name)
+                    mrp_text = await self._extract_text_from_element_enhanced(element, config["_compiled_selectors"]["product_mrp"], store_name)
+                    quantity = await self._extract_text_from_element_enhanced(element, config["_compiled_selectors"]["product_quantity"], store_name)
 
                     # If no name found, try generic selectors
                     if not name:
@@ -715,10 +1123,6 @@ class PlaywrightGroceryScraper:
                     if not price_text:
                         price_text = await self._extract_text_generic(element, ["*:has-text('₹')", "[class*='price']", "[class*='Price']", "[class*='amount']"])
 
-                    # Parse prices
-                    price = self._parse_price(price_text)
-                    mrp = self._parse_price(mrp_text)
-
                     # Check availability
                     out_of_stock_elements = await element.locator(config["selectors"].get("out_of_stock", "")).all()
                     available = len(out_of_stock_elements) == 0
@@ -726,29 +1130,10 @@ class PlaywrightGroceryScraper:
                     # Get product URL if possible
                     product_url = await self._extract_product_url(element, store_name)
 
-                    # Log extraction details for debugging
-                    logger.debug(f"Product {i}: name='{name}', price_text='{price_text}', price={price}")
-
-                    # More relaxed criteria - accept products with name OR price
-                    if (name and name.strip()) or (price is not None):
-                        # If no name, use a generic description
-                        if not name or not name.strip():
-                            name = f"Product from {store_name}"
-
-                        product = ProductData(
-                            name=name.strip(),
-                            price=price,
-                            mrp=mrp,
-                            quantity=quantity.strip() if quantity else "",
-                            available=available,
-                            store=store_name,
-                            search_term=search_term,
-                            product_url=product_url
-                        )
+                    product = self._build_product_row(i, name, price_text, mrp_text, quantity, available, product_url, store_name)
+                    if product:
                         products.append(product)
 
-                        logger.info(f"Extracted: {name} - ₹{price} from {store_name}")
-
                 except Exception as e:
                     logger.warning(f"Failed to extract product {i} from {store_name}: {e}")
                     continue
@@ -756,16 +1141,50 @@ class PlaywrightGroceryScraper:
         except Exception as e:
             logger.error(f"Product extraction failed for {store_name}: {e}")
 
+        logger.info("Extracted %d products from %s", len(products), store_name)
         return products
 
-    async def _extract_text_from_element_enhanced(self, element, selectors: str, store_name: str) -> str:
-        """Enhanced text extraction with better fallbacks"""
-        if not selectors:
-            return ""
+    def _build_product_row(self, index: int, name: Optional[str], price_text: Optional[str], mrp_text: Optional[str],
+                           quantity: Optional[str], available: bool, product_url: Optional[str],
+                           store_name: str) -> Optional[Dict]:
+        """Turn extracted raw fields into a product row, or None if nothing usable was found"""
+        # Parse prices
+        price = self._parse_price(price_text)
+        mrp = self._parse_price(mrp_text)
+
+        # Log extraction details for debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Product {index}: name='{name}', price_text='{price_text}', price={price}")
+
+        # More relaxed criteria - accept products with name OR price
+        if not ((name and name.strip()) or (price is not None)):
+            return None
 
-        for selector in selectors.split(", "):
+        # If no name, use a generic description
+        if not name or not name.strip():
+            name = f"Product from {store_name}"
+
+        return {
+            "price": price,
+            "available": available,
+            "name": name.strip(),
+            "quantity": quantity.strip() if quantity else "",
+            "url": product_url,
+            "mrp": mrp
+        }
+
+    def _normalize_product_url(self, href: Optional[str], store_name: str) -> Optional[str]:
+        """Make a relative product link absolute for the store"""
+        if not href:
+            return None
+        if not href.startswith("http"):
+            href = f"{self.store_configs[store_name]['base_url']}{href}"
+        return href
+
+    async def _extract_text_from_element_enhanced(self, element, selectors: Tuple[str, ...], store_name: str) -> str:
+        """Enhanced text extraction with better fallbacks"""
+        for selector in selectors:
             try:
-                selector = selector.strip()
                 text_elements = await element.locator(selector).all()
 
                 for text_element in text_elements:
@@ -781,7 +1200,7 @@ class PlaywrightGroceryScraper:
                 continue
         return ""
 
-    async def _extract_text_generic(self, element, selectors: List[str]) -> str:
+    async def _extract_text_generic(self, element, selectors: Tuple[str, ...]) -> str:
         """Generic text extraction for fallback scenarios"""
         for selector in selectors:
             try:
@@ -798,24 +1217,14 @@ class PlaywrightGroceryScraper:
         return ""
 
     async def _extract_product_url(self, element, store_name: str) -> Optional[str]:
-        """Extract product URL with fallbacks"""
+        """Extract product URL from the card's first link"""
         try:
-            # Try different link selectors
-            link_selectors = ["a", "[href]", "a[href]"]
+            href = await element.locator("a[href]").first.get_attribute("href", timeout=500)
+        except Exception:
+            return None
 
-            for selector in link_selectors:
-                try:
-                    link_elements = await element.locator(selector).all()
-                    for link_element in link_elements:
-                        href = await link_element.get_attribute("href")
-                        if href and ("/product" in href or "/item" in href or len(href) > 10):
-                            if not href.startswith("http"):
-                                href = f"{self.store_configs[store_name]['base_url']}{href}"
-                            return href
-                except:
-                    continue
-        except:
-            pass
+        if href and ("/product" in href or "/item" in href or len(href) > 10):
+            return self._normalize_product_url(href, store_name)
         return None
 
     def _parse_price(self, price_text: str) -> Optional[float]:
@@ -823,45 +1232,82 @@ class PlaywrightGroceryScraper:
         if not price_text:
             return None
 
-        # Remove currency symbols and extract numbers
-        price_match = re.search(r'[\d,]+\.?\d*', price_text.replace(',', '').replace('₹', ''))
+        # Remove currency symbols; well-formed prices like "₹1,299.00" parse directly.
+        # "NaN"/"inf" parse as floats but aren't prices, so they fall through to the regex
+        stripped = price_text.translate(_PRICE_STRIP)
+        try:
+            price = float(stripped.strip())
+            if math.isfinite(price):
+                return price
+        except ValueError:
+            pass
+
+        # Otherwise extract the first number from the text
+        price_match = _PRICE_RE.search(stripped)
         if price_match:
             try:
-                return float(price_match.group().replace(',', ''))
+                return float(price_match.group())
             except:
                 return None
         return None
 
-    def _calculate_similarity_score(self, product_name: str, search_term: str) -> float:
-        """Calculate similarity between product name and search term"""
-        product_words = set(product_name.lower().split())
-        search_words = set(search_term.lower().split())
-
-        if not search_words:
-            return 0.0
-
-        # Calculate Jaccard similarity
-        intersection = len(product_words.intersection(search_words))
-        union = len(product_words.union(search_words))
-
-        return intersection / union if union > 0 else 0
+    def _observe_product_names(self, names: List[str]):
+        """Update word document frequencies; weights are derived from them on lookup"""
+        token_df = self._token_df
+        for name in names:
+            for token in set(name.lower().split()):
+                token_df[token] = token_df.get(token, 0) + 1
+        self._names_seen += len(names)
+
+    def _token_weight(self, token: str) -> float:
+        """IDF weight of a word, 1.0 for words never seen"""
+        df = self._token_df.get(token)
+        if not df:
+            return 1.0
+        # log1p keeps words present in every name at a small positive weight
+        return math.log1p(self._names_seen / df)
+
+    def _calculate_similarity_score(self, product_name: str, search_tokens: frozenset, search_weight_sum: float) -> float:
+        """Weighted Jaccard similarity between product name and search words"""
+        weight_of = self._token_weight
+        inter = 0.0
+        extra = 0.0
+        for token in set(product_name.lower().split()):
+            weight = weight_of(token)
+            if token in search_tokens:
+                inter += weight
+            else:
+                extra += weight
+        return inter / (search_weight_sum + extra)
 
-    def _find_best_match(self, products: List[ProductData], search_term: str) -> Optional[ProductData]:
+    def _find_best_match(self, products: List[Dict], search_term: str) -> Optional[Dict]:
         """Find the best matching product for the search term"""
         if not products:
             return None
 
         # Filter available products first
-        available_products = [p for p in products if p.available]
+        available_products = [p for p in products if p["available"]]
         if not available_products:
             available_products = products  # Fallback to all products
 
+        # Common case: the search term appears verbatim in a product name
+        search_lower = search_term.lower()
+        for product in available_products:
+            if product["available"] and search_lower in product["name"].lower():
+                return product
+
+        search_tokens = frozenset(search_lower.split())
+        if not search_tokens:
+            return available_products[0]
+
+        search_weight_sum = sum(self._token_weight(token) for token in search_tokens)
+
         # Score products by similarity
         best_product = None
         best_score = 0.0
 
         for product in available_products:
-            score = self._calculate_similarity_score(product.name, search_term)
+            score = self._calculate_similarity_score(product["name"], search_tokens, search_weight_sum)
             if score > best_score:
                 best_score = score
                 best_product = product
@@ -875,24 +1321,24 @@ class PlaywrightGroceryScraper:
             stores = list(self.store_configs.keys())
 
         results = {}
-        semaphore = asyncio.Semaphore(2)  # Reduce concurrency to 2
+        # Caps in-flight pages across all items and stores
+        semaphore = asyncio.Semaphore(4)
 
         async def scrape_store_for_item(store: str, item: str):
             async with semaphore:
                 try:
-                    await asyncio.sleep(random.uniform(1, 3))  # Random delay
-                    products = await self.scrape_store_products(store, item, location)
+                    await asyncio.sleep(self._store_backoff.get(store, 0.3))
+                    products = await asyncio.wait_for(
+                        self._scrape_store_rows(store, item, location),
+                        timeout=120  # 2 minute timeout per store/item
+                    )
+                    # Failed attempts are swallowed by _scrape_store_rows, so no rows counts as an error
+                    self._update_backoff(store, bool(products))
+                    self._observe_product_names([p["name"] for p in products])
                     best_match = self._find_best_match(products, item)
 
                     if best_match:
-                        return {
-                            "price": best_match.price,
-                            "available": best_match.available,
-                            "name": best_match.name,
-                            "quantity": best_match.quantity,
-                            "url": best_match.product_url,
-                            "mrp": best_match.mrp
-                        }
+                        return dict(best_match)
                     else:
                         return {
                             "price": None,
@@ -906,8 +1352,21 @@ class PlaywrightGroceryScraper:
                 except asyncio.CancelledError:
                     logger.info(f"Scraping cancelled for {store}/{item}")
                     raise
+                except asyncio.TimeoutError:
+                    logger.error(f"Timeout scraping {store} for {item}")
+                    self._update_backoff(store, False)
+                    return {
+                        "price": None,
+                        "available": False,
+                        "name": "",
+                        "quantity": "",
+                        "url": None,
+                        "mrp": None,
+                        "error": "Timeout"
+                    }
                 except Exception as e:
                     logger.error(f"Error scraping {store} for {item}: {e}")
+                    self._update_backoff(store, False)
                     return {
                         "price": None,
                         "available": False,
@@ -918,50 +1377,91 @@ class PlaywrightGroceryScraper:
                         "error": str(e)
                     }
 
-        for item in items:
-            logger.info(f"Processing item: {item}")
-
-            try:
-                tasks = [scrape_store_for_item(store, item) for store in stores]
-                store_results = await asyncio.wait_for(
-                    asyncio.gather(*tasks, return_exceptions=True),
-                    timeout=120  # 2 minute timeout per item
-                )
-
-                item_data = {}
-                for i, result in enumerate(store_results):
-                    store = stores[i]
-                    if isinstance(result, Exception):
-                        logger.error(f"Exception for {store}/{item}: {result}")
-                        item_data[store] = {
-                            "price": None,
-                            "available": False,
-                            "name": "",
-                            "quantity": "",
-                            "url": None,
-                            "mrp": None,
-                            "error": str(result)
-                        }
-                    else:
-                        item_data[store] = result
+        # Scrape every item/store pair concurrently; the semaphore bounds browser load
+        pairs = [(item, store) for item in items for store in stores]
+        logger.info(f"Processing {len(items)} items across {len(stores)} stores")
 
-                results[item] = item_data
-                await asyncio.sleep(2)  # Longer delay between items
+        store_results = await asyncio.gather(
+            *(scrape_store_for_item(store, item) for item, store in pairs),
+            return_exceptions=True
+        )
 
-            except asyncio.TimeoutError:
-                logger.error(f"Timeout processing item: {item}")
-                results[item] = {store: {"price": None, "available": False, "name": "", "quantity": "", "url": None, "mrp": None, "error": "Timeout"} for store in stores}
+        for item in items:
+            results[item] = {}
+
+        for (item, store), result in zip(pairs, store_results):
+            if isinstance(result, BaseException):
+                logger.error(f"Exception for {store}/{item}: {result}")
+                results[item][store] = {
+                    "price": None,
+                    "available": False,
+                    "name": "",
+                    "quantity": "",
+                    "url": None,
+                    "mrp": None,
+                    "error": str(result)
+                }
+            else:
+                results[item][store] = result
 
         return results
 
     async def close(self):
         """Close browser and cleanup"""
+        self._location_set.clear()
         if self.context:
             await self.context.close()
         if self.browser:
             await self.browser.close()
         if hasattr(self, 'playwright'):
             await self.playwright.stop()
+        self.context = None
+        self.browser = None
+
+
+# Shared scraper so the browser and context survive across calls. Playwright
+# objects are bound to the event loop that created them, so the singleton is
+# tracked together with its loop.
+_SCRAPER: Optional[PlaywrightGroceryScraper] = None
+_SCRAPER_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SCRAPER_LOCK: Optional[asyncio.Lock] = None
+
+
+async def get_scraper() -> PlaywrightGroceryScraper:
+    """Return the shared scraper for the running event loop, starting it on first use"""
+    global _SCRAPER, _SCRAPER_LOOP, _SCRAPER_LOCK
+
+    loop = asyncio.get_running_loop()
+    if _SCRAPER_LOOP is not loop:
+        _SCRAPER, _SCRAPER_LOOP, _SCRAPER_LOCK = None, loop, asyncio.Lock()
+
+    async with _SCRAPER_LOCK:
+        if _SCRAPER is None:
+            _SCRAPER = PlaywrightGroceryScraper()
+        await _SCRAPER.ensure_started()
+    return _SCRAPER
+
+
+def _close_scraper_at_exit():
+    """Close the shared browser on interpreter exit"""
+    scraper, loop = _SCRAPER, _SCRAPER_LOOP
+    if scraper is None or loop is None or loop.is_closed():
+        return
+    try:
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(scraper.close(), loop).result(timeout=10)
+        else:
+            loop.run_until_complete(scraper.close())
+    except Exception as e:
+        logger.warning(f"Failed to close shared scraper: {e}")
+
+
+atexit.register(_close_scraper_at_exit)
+
+# Long-lived event loop for the sync API. Running every call on the same loop
+# keeps the shared browser alive across calls (e.g. Streamlit reruns).
+_LOOP = asyncio.new_event_loop()
+threading.Thread(target=_LOOP.run_forever, name="grocery-scraper-loop", daemon=True).start()
 
 
 # Public API functions for integration with existing code
@@ -977,33 +1477,29 @@ async def fetch_prices_for_list_real(items: List[str], location: str = "Mumbai",
     Returns:
         Dictionary with item -> store -> price data
     """
-    async with PlaywrightGroceryScraper() as scraper:
-        results = await scraper.scrape_all_stores(items, stores, location)
+    scraper = await get_scraper()
+    results = await scraper.scrape_all_stores(items, stores, location)
 
-        # Cache results if db module available
-        try:
-            from db import cache_price
-            for item, stores_data in results.items():
-                for store, data in stores_data.items():
-                    if data.get("price"):
-                        cache_price(store, item, data["price"], data.get("available", False))
-        except ImportError:
-            logger.info("Database caching not available")
+    # Cache results if db module available
+    try:
+        from db import cache_price
+        for item, stores_data in results.items():
+            for store, data in stores_data.items():
+                if data.get("price"):
+                    cache_price(store, item, data["price"], data.get("available", False))
+    except ImportError:
+        logger.info("Database caching not available")
 
-        return results
+    return results
 
 
 def fetch_prices_for_list_real_sync(items: List[str], location: str = "Mumbai", stores: List[str] = None) -> Dict:
     """Synchronous wrapper with timeout handling"""
+    future = asyncio.run_coroutine_threadsafe(fetch_prices_for_list_real(items, location, stores), _LOOP)
     try:
-        # Properly run the async function in a new event loop
-        return asyncio.run(
-            asyncio.wait_for(
-                fetch_prices_for_list_real(items, location, stores),
-                timeout=300  # 5 minute total timeout
-            )
-        )
-    except asyncio.TimeoutError:
+        return future.result(timeout=300)  # 5 minute total timeout
+    except FuturesTimeoutError:
+        future.cancel()
         logger.error("Overall scraping timeout reached")
         return {item: {store: {"price": None, "available": False, "name": "", "quantity": "", "url": None, "mrp": None, "error": "Timeout"} for store in (stores or ["Blinkit", "Instamart", "Zepto"])} for item in items}
     except Exception as e:
@@ -13,6 +13,71 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+class UncachedFetch(Exception):
+    """Raised out of cached_fetch so Streamlit doesn't cache a failed scrape; carries the result"""
+
+    def __init__(self, results):
+        super().__init__("price fetch failed")
+        self.results = results
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def cached_fetch(items_tuple, location, stores_tuple):
+    """
+    Fetch prices, reusing results for the same items/stores/location for 10 minutes.
+    Results without a single price (errors, timeouts) raise UncachedFetch instead of being cached.
+    """
+    results = fetch_prices_for_list_real_sync(list(items_tuple), location, list(stores_tuple))
+    if not any(
+        isinstance(info, dict) and info.get("price") is not None
+        for stores_data in (results or {}).values() if isinstance(stores_data, dict)
+        for info in stores_data.values()
+    ):
+        raise UncachedFetch(results)
+    return results
+
+
+@st.cache_data(show_spinner=False)
+def summarize_cart(optimization_result, delivery_fees, include_delivery):
+    """
+    Build the cart rows and totals for an optimization result.
+    Returns (cart_data, total_cost, delivery_cost, used_stores, unavailable_items, store_breakdown)
+    """
+    cart_data = []
+    total_cost = 0
+    used_stores = set()
+    unavailable_items = []
+    store_breakdown = {}
+
+    for item, assignment in optimization_result.items():
+        if assignment and assignment[0]:  # Store assigned
+            store, price = assignment
+            cart_data.append({
+                "Product": item,
+                "Store": store,
+                "Price": f"₹{price:.2f}",
+                "Status": "✅ Added to Cart"
+            })
+            total_cost += price
+            used_stores.add(store)
+            store_breakdown[store] = store_breakdown.get(store, 0) + 1
+        else:
+            unavailable_items.append(item)
+            cart_data.append({
+                "Product": item,
+                "Store": "N/A",
+                "Price": "N/A",
+                "Status": "❌ Unavailable"
+            })
+
+    delivery_cost = 0
+    if include_delivery:
+        delivery_cost = sum(delivery_fees.get(store, 0) for store in used_stores)
+
+    return cart_data, total_cost, delivery_cost, used_stores, unavailable_items, store_breakdown
+
+
 # Custom CSS for better UI
 st.markdown("""
 <style>
@@ -147,7 +212,11 @@ if st.session_state.get('run_comparison', False):
 
             # Fetch real prices
             start_time = time.time()
-            price_results = fetch_prices_for_list_real_sync(items, selected_location, selected_stores)
+            try:
+                price_results = cached_fetch(tuple(sorted(items)), selected_location, tuple(sorted(selected_stores)))
+            except UncachedFetch as e:
+                # Not cached, so trying again really scrapes again
+                price_results = e.results
 
 
             elapsed_time = time.time() - start_time
@@ -177,25 +246,26 @@ if st.session_state.get('comparison_done', False) and 'price_results' in st.sess
     st.markdown("---")
     st.header("📊 Price Comparison Results")
 
-    # Create comparison table
-    comparison_data = []
+    # Create comparison table, column by column
+    comparison_data = {"Product": []}
+    for store in selected_stores:
+        comparison_data[f"{store} Price"] = []
+        comparison_data[f"{store} Status"] = []
 
     for item, stores_data in price_results.items():
-        row = {"Product": item}
+        comparison_data["Product"].append(item)
 
         for store in selected_stores:
             if store in stores_data and stores_data[store]["available"]:
                 price = stores_data[store]["price"]
-                row[f"{store} Price"] = f"₹{price:.2f}" if price else "N/A"
-                row[f"{store} Status"] = "✅ Available"
+                comparison_data[f"{store} Price"].append(f"₹{price:.2f}" if price else "N/A")
+                comparison_data[f"{store} Status"].append("✅ Available")
             else:
-                row[f"{store} Price"] = "❌ N/A"
-                row[f"{store} Status"] = "❌ Out of Stock"
-
-        comparison_data.append(row)
+                comparison_data[f"{store} Price"].append("❌ N/A")
+                comparison_data[f"{store} Status"].append("❌ Out of Stock")
 
-    if comparison_data:
-        df_comparison = pd.DataFrame(comparison_data)
+    if comparison_data["Product"]:
+        df_comparison = pd.DataFrame(comparison_data, copy=False)
         st.dataframe(df_comparison, use_container_width=True, hide_index=True)
 
         # Optimization Section
@@ -233,30 +303,8 @@ if st.session_state.get('comparison_done', False) and 'price_results' in st.sess
                 # Display optimized results
                 st.subheader("🛍️ Your Optimized Cart")
 
-                cart_data = []
-                total_cost = 0
-                used_stores = set()
-                unavailable_items = []
-
-                for item, assignment in optimization_result.items():
-                    if assignment and assignment[0]:  # Store assigned
-                        store, price = assignment
-                        cart_data.append({
-                            "Product": item,
-                            "Store": store,
-                            "Price": f"₹{price:.2f}",
-                            "Status": "✅ Added to Cart"
-                        })
-                        total_cost += price
-                        used_stores.add(store)
-                    else:
-                        unavailable_items.append(item)
-                        cart_data.append({
-                            "Product": item,
-                            "Store": "N/A",
-                            "Price": "N/A",
-                            "Status": "❌ Unavailable"
-                        })
+                cart_data, total_cost, delivery_cost, used_stores, unavailable_items, store_breakdown = \
+                    summarize_cart(optimization_result, delivery_fees, include_delivery)
 
                 # Display cart table
                 df_cart = pd.DataFrame(cart_data)
@@ -266,13 +314,9 @@ if st.session_state.get('comparison_done', False) and 'price_results' in st.sess
                 col1, col2, col3 = st.columns(3)
 
                 with col1:
-                    st.metric("Items in Cart", len([x for x in cart_data if x["Status"] == "✅ Added to Cart"]))
+                    st.metric("Items in Cart", len(cart_data) - len(unavailable_items))
 
                 with col2:
-                    delivery_cost = 0
-                    if include_delivery:
-                        delivery_cost = sum(delivery_fees.get(store, 0) for store in used_stores)
-
                     total_with_delivery = total_cost + delivery_cost
                     st.metric("Total Cost", f"₹{total_with_delivery:.2f}",
                               f"Delivery: ₹{delivery_cost:.2f}" if include_delivery else "")
@@ -284,12 +328,6 @@ if st.session_state.get('comparison_done', False) and 'price_results' in st.sess
                 if used_stores:
                     st.subheader("🏪 Store Distribution")
 
-                    store_breakdown = {}
-                    for item, assignment in optimization_result.items():
-                        if assignment and assignment[0]:
-                            store = assignment[0]
-                            store_breakdown[store] = store_breakdown.get(store, 0) + 1
-
                     for store, count in store_breakdown.items():
                         col1, col2 = st.columns([3, 1])
                         with col1:
@@ -1,11 +1,21 @@
 # scrapers_real.py - Integrated with working Playwright APIs for both Blinkit and Instamart
+import asyncio
+import atexit
+import json
+import logging
 import os
 import time
 import math
 import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+log = logging.getLogger("scraper_real")
+
 # Safe database saving function to avoid import issues
 def _safe_save_to_db(store, item_text, price, available, meta=None):
     """Safe database saving that doesn't break scraper if db import fails"""
@@ -20,7 +30,7 @@ def _safe_save_to_db(store, item_text, price, available, meta=None):
         )
     except Exception as e:
         # Don't let database errors break the scraper
-        print(f"⚠️ DB save skipped for {item_text}@{store}: {e}")
+        log.warning("⚠️ DB save skipped for %s@%s: %s", item_text, store, e)
 
 # Import the working Playwright APIs
 try:
@@ -29,7 +39,7 @@ try:
 except ImportError:
     BLINKIT_AVAILABLE = False
     search_blinkit_products = None
-    print("Warning: blinkit_playwright_api not found. Blinkit scraping disabled.")
+    log.warning("blinkit_playwright_api not found. Blinkit scraping disabled.")
 
 try:
     from instamart_playwright_api import search_instamart_products
@@ -37,48 +47,110 @@ try:
 except ImportError:
     INSTAMART_AVAILABLE = False
     search_instamart_products = None
-    print("Warning: instamart_playwright_api not found. Instamart scraping disabled.")
+    log.warning("instamart_playwright_api not found. Instamart scraping disabled.")
 
 PLAYWRIGHT_AVAILABLE = BLINKIT_AVAILABLE or INSTAMART_AVAILABLE
 
 # Always import requests since it's used in both fallback and geocoding
 import requests
+
+# orjson parses large search responses several times faster; stdlib json otherwise
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = lambda obj: json.dumps(obj).encode("utf-8")
+
+# ijson streams oversized responses instead of materializing the whole tree; optional
+try:
+    import ijson as _ijson
+except ImportError:
+    _ijson = None
+
+# Below this size a full parse is faster than streaming
+_STREAM_MIN_BYTES = 128 * 1024
+
+# httpx lets the fallback path multiplex all searches on one event loop; optional
+try:
+    import httpx as _httpx
+except ImportError:
+    _httpx = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# rapidfuzz gives better fuzzy name matching in native code; optional
+try:
+    from rapidfuzz import fuzz as _fuzz, process as _fuzz_process
+except ImportError:
+    _fuzz = _fuzz_process = None
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 # --------- Helpers ----------------------------------------------------------
 
-def _safe_float(x) -> Optional[float]:
-    if x is None: return None
-    if isinstance(x, (int, float)): return float(x)
-    s = str(x)
-    s = re.sub(r"[^\d.\-]", "", s)
-    try:
-        return float(s)
-    except Exception:
-        return None
-
-def _find_price_candidates(obj: Any, path: str = "") -> List[Tuple[str, float]]:
-    candidates = []
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            kl = k.lower()
-            if kl in ("price", "mrp", "selling_price", "offer_price", "final_price", "amount", "value"):
-                val = _safe_float(v)
-                if val is not None:
-                    candidates.append((f"{path}/{k}", val))
-            if isinstance(v, (dict, list)):
-                candidates += _find_price_candidates(v, f"{path}/{k}")
-    elif isinstance(obj, list):
-        for i, el in enumerate(obj):
-            candidates += _find_price_candidates(el, f"{path}[{i}]")
-    return candidates
+@dataclass(slots=True)
+class PriceResult:
+    """Price lookup result for one item at one store"""
+    price: Optional[float]
+    available: bool
+    name: str = ""
+    quantity: str = ""
+    meta: Any = None
+    error: Optional[str] = None
+
+    def get(self, key: str, default=None):
+        """Dict-style access so callers written against the old result dicts keep working"""
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+_PINCODE_RE = re.compile(r"^\d{4,6}$")
+
+# Hot JSON helpers live in their own module so they can be compiled with mypyc
+from _scraper_hot import _safe_float, _find_price_candidates, _collect_names, _PRICE_KEYS, _NAME_KEYS
+
+# Known locations of the product list in Blinkit / Instamart search responses
+_BLINKIT_PATHS = [("response", "snippets"), ("data", "entities"), ("data", "products")]
+_INSTAMART_PATHS = [("data", "cards"), ("data", "items")]
+_SCHEMA_PATHS = _BLINKIT_PATHS + _INSTAMART_PATHS
+
+def _fast_extract(j: Dict[str, Any], paths):
+    """Yield the elements of every list found at one of the key paths"""
+    for path in paths:
+        node = j
+        for k in path:
+            node = node.get(k) if isinstance(node, dict) else None
+            if not node:
+                break
+        if isinstance(node, list):
+            yield from node
+
+def _product_from_element(el: Dict[str, Any]) -> Dict[str, Any]:
+    name = el.get("name") or el.get("title") or el.get("display_name") or (el.get("item") or {}).get("name")
+    prices = _find_price_candidates(el)
+    min_price = min(prices) if prices else None
+    return {"name": name, "prices": prices, "min_price": min_price, "raw": el}
 
 def _get_products_with_prices(json_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Heuristic discovery of products in Blinkit-like responses.
     Returns list of dicts: { 'name': str | None, 'min_price': float | None, 'prices': [..], 'raw': el }
     """
+    # Fast path: only walk the product list at a known schema location
+    products = [_product_from_element(el) for el in _fast_extract(json_data, _SCHEMA_PATHS) if isinstance(el, dict)]
+    if any(p["min_price"] is not None for p in products):
+        return products
+
     products = []
     list_keys = ["entities", "items", "products", "vertical_cards", "results", "data", "payload"]
     for key in list_keys:
@@ -87,94 +159,261 @@ def _get_products_with_prices(json_data: Dict[str, Any]) -> List[Dict[str, Any]]
             for el in node:
                 if not isinstance(el, dict):
                     continue
-                # find name
-                name = el.get("name") or el.get("title") or el.get("display_name") or (el.get("item") or {}).get("name")
-                prices = [p for (_, p) in _find_price_candidates(el)]
-                min_price = min(prices) if prices else None
-                products.append({"name": name, "prices": prices, "min_price": min_price, "raw": el})
+                products.append(_product_from_element(el))
             if products:
                 return products
 
     # fallback: search any nested object for price candidates and names
+    log.warning("⚠️ No product list at a known path (top-level keys: %s), scanning whole response", list(json_data)[:10])
     price_cands = _find_price_candidates(json_data)
-    name_cands = []
-    def _collect_names(o):
-        if isinstance(o, dict):
-            for k,v in o.items():
-                if isinstance(v, str) and k.lower() in ("name","title","display_name","label","product_name"):
-                    name_cands.append(v)
-                _collect_names(v)
-        elif isinstance(o, list):
-            for el in o:
-                _collect_names(el)
-    _collect_names(json_data)
     if price_cands:
-        _, p = min(price_cands, key=lambda x: x[1])
+        p = min(price_cands)
+        name_cands = _collect_names(json_data)
         name = name_cands[0] if name_cands else None
         products.append({"name": name, "prices":[p], "min_price": p, "raw": json_data})
     return products
 
-# --------- HTTP session with retries (fallback only) ----------------------
+def _stream_products(r) -> List[Dict[str, Any]]:
+    """
+    Stream a (large) JSON response and collect objects that carry both a name and a price.
+    Returns the same shape as _get_products_with_prices, with 'raw' holding only those fields.
+    """
+    r.raw.decode_content = True
+    products = []
+    stack = []  # one {"name", "prices"} accumulator per open JSON object
+    for prefix, event, value in _ijson.parse(r.raw):
+        if event == "start_map":
+            stack.append({"name": None, "prices": []})
+        elif event == "end_map":
+            node = stack.pop()
+            if node["name"] and node["prices"]:
+                products.append({"name": node["name"], "prices": node["prices"],
+                                 "min_price": min(node["prices"]), "raw": node})
+            elif stack:
+                # Nested fields such as price: {"value": 49} belong to the enclosing object
+                parent = stack[-1]
+                parent["prices"] += node["prices"]
+                parent["name"] = parent["name"] or node["name"]
+        elif stack and event in ("string", "number"):
+            key = prefix.rpartition(".")[2].lower()
+            if key in _PRICE_KEYS:
+                val = _safe_float(value)
+                if val is not None:
+                    stack[-1]["prices"].append(val)
+            elif key in _NAME_KEYS and event == "string" and not stack[-1]["name"]:
+                stack[-1]["name"] = value
+    return products
+
+def _price_or_inf(p: Dict[str, Any]) -> float:
+    return p["min_price"] if p.get("min_price") is not None else math.inf
+
+def _pick_best_product(item_text: str, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Pick the product whose name best matches item_text, preferring the lower price on ties.
+    Uses rapidfuzz's WRatio when installed, else a substring + shared-word score.
+    """
+    if _fuzz_process is not None:
+        choices = [p.get("name") or "" for p in products]
+        matches = _fuzz_process.extract(item_text, choices, scorer=_fuzz.WRatio, score_cutoff=40, limit=None)
+        if matches:
+            _, _, idx = min(matches, key=lambda m: (-m[1], _price_or_inf(products[m[2]])))
+            return products[idx]
+
+    q_low = item_text.lower().strip()
+    q_tokens = frozenset(q_low.split())
+    scored = []
+    for p in products:
+        name = p["name"].lower() if p.get("name") else ""
+        score = 0
+        if q_low and name:
+            score = (2 if q_low in name else 0) + len(q_tokens.intersection(name.split()))
+        scored.append((score, _price_or_inf(p), p))
+
+    # prefer high score, then low price
+    return min(scored, key=lambda x: (-x[0], x[1]))[2]
+
+# --------- HTTP session with retries ----------------------------------------
 
 def _create_session(retries: int = 3, backoff: float = 0.3, status_forcelist=(429, 500, 502, 503, 504)):
-    if not PLAYWRIGHT_AVAILABLE:
-        s = requests.Session()
-        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=status_forcelist, allowed_methods=("GET","POST"))
-        adapter = HTTPAdapter(max_retries=retry)
-        s.mount("https://", adapter)
-        s.mount("http://", adapter)
-        return s
-    return None
+    s = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=status_forcelist, allowed_methods=("GET","POST"))
+    adapter = HTTPAdapter(max_retries=retry)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+# Search requests are prepared once; each call copies the template and only swaps
+# in the headers and JSON body, skipping URL parsing and header rebuilding
+_BLINKIT_REQ_TEMPLATE = requests.Request("POST", "https://blinkit.com/v1/layout/search",
+                                         headers={"Content-Type": "application/json"}).prepare()
+_INSTAMART_REQ_TEMPLATE = requests.Request("POST", "https://instamart.com/v1/layout/search",
+                                           headers={"Content-Type": "application/json"}).prepare()
+
+def _post_prepared(session, template, payload: Dict[str, Any], headers: Dict[str, str], timeout: int):
+    req = template.copy()
+    req.headers.update(headers)
+    req.prepare_cookies(session.cookies)
+    req.body = _json_dumps(payload)
+    req.headers["Content-Length"] = str(len(req.body))
+    return session.send(req, timeout=timeout, stream=True)
+
+# Shared keep-alive session for geocoding and the fallback scrapers, so repeated
+# calls reuse open connections instead of paying a new TLS handshake each time
+_HTTP = _create_session()
+atexit.register(_HTTP.close)
 
 # --------- Geocoding helper -------------------------------------------------
 
+# Default coordinates for major cities (fallback if geocoding fails)
+_DEFAULT_COORDS = {
+    "mumbai": (19.0760, 72.8777),
+    "delhi": (28.7041, 77.1025),
+    "bangalore": (12.9716, 77.5946),
+    "hyderabad": (17.3850, 78.4867),
+    "chennai": (13.0827, 80.2707),
+    "kolkata": (22.5726, 88.3639),
+    "pune": (18.5204, 73.8567),
+    "gurgaon": (28.4595, 77.0266)
+}
+
+# Successful lookups persist across runs, keyed by normalized location/pincode
+_GEO_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "smart-grocery-cart", "geo.json")
+_GEO_CACHE_DIRTY = False
+
+try:
+    with open(_GEO_CACHE_PATH, "r", encoding="utf-8") as f:
+        _GEO_CACHE: Dict[str, List[float]] = json.load(f)
+except (OSError, ValueError):
+    _GEO_CACHE = {}
+
+def _save_geo_cache():
+    if not _GEO_CACHE_DIRTY:
+        return
+    try:
+        os.makedirs(os.path.dirname(_GEO_CACHE_PATH), exist_ok=True)
+        with open(_GEO_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(_GEO_CACHE, f)
+    except OSError as e:
+        log.warning("⚠️ Could not save geocoding cache: %s", e)
+
+atexit.register(_save_geo_cache)
+
+def _normalize_location(location: str) -> str:
+    """Lowercase, trim and strip accents so spelling variants share a cache entry"""
+    decomposed = unicodedata.normalize("NFKD", location or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+@lru_cache(maxsize=1024)
+def _geocode_cached(location_key: str, pincode: Optional[str], timeout: int) -> Tuple[float, float]:
+    """
+    Look up coordinates in the disk cache, else query Nominatim.
+    Raises on failure so lru_cache only remembers successful lookups.
+    """
+    global _GEO_CACHE_DIRTY
+    cache_key = f"pin:{pincode}" if pincode else f"q:{location_key}"
+    cached = _GEO_CACHE.get(cache_key)
+    if cached:
+        return cached[0], cached[1]
+
+    headers = {"User-Agent": "smart-grocery-cart/1.0"}
+    if pincode:
+        params = {"postalcode": pincode, "country": "India", "format": "json"}
+    else:
+        params = {"q": location_key, "country": "India", "format": "json", "limit": 1}
+    resp = _HTTP.get("https://nominatim.openstreetmap.org/search", params=params, headers=headers, timeout=timeout)
+    resp.raise_for_status()
+    data = resp.json()
+    if not data:
+        raise LookupError(f"No geocoding result for {cache_key}")
+
+    coords = float(data[0]["lat"]), float(data[0]["lon"])
+    _GEO_CACHE[cache_key] = list(coords)
+    _GEO_CACHE_DIRTY = True
+    return coords
+
 def _geocode_location(location: str, pincode: Optional[str] = None, timeout: int = 8) -> Tuple[Optional[float], Optional[float]]:
     """
     Use Nominatim as a fallback to turn a city/pincode into lat/lon.
     For pincode (all digits), we query postalcode; otherwise we query the city name.
     """
-    # Default coordinates for major cities (fallback if geocoding fails)
-    default_coords = {
-        "mumbai": (19.0760, 72.8777),
-        "delhi": (28.7041, 77.1025),
-        "bangalore": (12.9716, 77.5946),
-        "hyderabad": (17.3850, 78.4867),
-        "chennai": (13.0827, 80.2707),
-        "kolkata": (22.5726, 88.3639),
-        "pune": (18.5204, 73.8567),
-        "gurgaon": (28.4595, 77.0266)
-    }
+    location_key = _normalize_location(location)
+    pincode = str(pincode).strip() if pincode else None
+    if pincode and not _PINCODE_RE.match(pincode):
+        pincode = None
 
-    # Try geocoding first
+    # Try the cache, then Nominatim
     try:
-        if PLAYWRIGHT_AVAILABLE:
-            import requests
-        headers = {"User-Agent": "smart-grocery-cart/1.0"}
-        if pincode and re.fullmatch(r"\d{4,6}", str(pincode)):
-            params = {"postalcode": pincode, "country": "India", "format": "json"}
-        else:
-            params = {"q": location, "country": "India", "format": "json", "limit": 1}
-        resp = requests.get("https://nominatim.openstreetmap.org/search", params=params, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        data = resp.json()
-        if data:
-            return float(data[0]["lat"]), float(data[0]["lon"])
+        return _geocode_cached(location_key, pincode, timeout)
     except Exception:
         pass
 
     # Fallback to default coordinates
-    location_key = location.lower().strip()
-    return default_coords.get(location_key, (28.7041, 77.1025))  # Default to Delhi
+    return _DEFAULT_COORDS.get(location_key, _DEFAULT_COORDS["delhi"])
+
+# --------- Shared fallback request/response handling -------------------------
+
+def _search_payload(item_text: str) -> Dict[str, Any]:
+    # Minimal payload - the layout/search endpoints tolerate previous_search_query in many examples
+    return {
+        "applied_filters": None,
+        "previous_search_query": item_text,
+        "processed_rails": {},
+        "postback_meta": {"pageMeta": {"scrollMeta": [{"entitiesCount": 0}]}}
+    }
+
+def _with_location_headers(headers: Dict[str, str], lat: Optional[float], lon: Optional[float]) -> Dict[str, str]:
+    # include lat/lon in headers if available (some endpoints accept them as headers)
+    if lat is not None or lon is not None:
+        headers = dict(headers)
+        if lat is not None:
+            headers.setdefault("lat", str(lat))
+        if lon is not None:
+            headers.setdefault("lon", str(lon))
+    return headers
+
+def _check_status(r) -> Optional[PriceResult]:
+    """Return an error result for a failed response (requests or httpx), else None"""
+    # 403 handling
+    if r.status_code == 403:
+        sample = (r.text or "")[:400]
+        return PriceResult(price=None, available=False, meta=sample, error="403 Forbidden - endpoint refused request (auth/csrf/cors/cookies may be required)")
+
+    if r.status_code >= 400:
+        return PriceResult(price=None, available=False, meta=r.text[:400], error=f"HTTP {r.status_code}")
+    return None
+
+def _result_from_body(store: str, item_text: str, r) -> PriceResult:
+    # try parse JSON; handle non-JSON safely
+    try:
+        j = _json_loads(r.content)
+    except ValueError:
+        # server returned non-JSON (HTML error page or text) -> return snippet to help debug
+        return PriceResult(price=None, available=False, meta=r.text[:1000], error=f"Invalid JSON response from {store} (unexpected content)")
+
+    # inspect response and find products/prices heuristically
+    return _result_from_products(item_text, _get_products_with_prices(j), j)
+
+def _result_from_products(item_text: str, products: List[Dict[str, Any]], j: Any) -> PriceResult:
+    if not products:
+        return PriceResult(price=None, available=False, meta=j, error="No product nodes found in response")
+
+    # match best candidate by name similarity + price
+    best = _pick_best_product(item_text, products)
+    best_price = best.get("min_price")
+    if best_price is None:
+        return PriceResult(price=None, available=False, meta=best.get("raw"), error="No numeric price parsed for matched product")
+    # return best result
+    return PriceResult(price=float(best_price), available=True, meta=best.get("raw"), error=None)
 
 # --------- Blinkit search call with Playwright integration -----------------
 
 def _blinkit_search_item_playwright(item_text: str, lat: Optional[float], lon: Optional[float],
-                                   headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> Dict[str, Any]:
+                                   headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> PriceResult:
     """
     Simple direct call to your working Blinkit API
     """
     if not PLAYWRIGHT_AVAILABLE or not BLINKIT_AVAILABLE:
-        return {"price": None, "available": False, "meta": None, "error": "Playwright API for Blinkit not available"}
+        return PriceResult(price=None, available=False, meta=None, error="Playwright API for Blinkit not available")
 
     try:
         # Use default coordinates if not provided
@@ -188,107 +427,65 @@ def _blinkit_search_item_playwright(item_text: str, lat: Optional[float], lon: O
         # Simple passthrough - if your API works standalone, just use its results directly
         if result.get('success') and result.get('best_match'):
             best_match = result['best_match']
-            return {
-                "price": best_match.get('price'),
-                "available": best_match.get('available', True),
-                "name": best_match.get('name', ''),
-                "quantity": best_match.get('quantity', ''),
-                "meta": best_match,
-                "error": None
-            }
+            return PriceResult(
+                price=best_match.get('price'),
+                available=best_match.get('available', True),
+                name=best_match.get('name', ''),
+                quantity=best_match.get('quantity', ''),
+                meta=best_match,
+                error=None
+            )
         else:
             # Return the exact error from your working API
-            return {
-                "price": None,
-                "available": False,
-                "meta": result,
-                "error": result.get('error', 'No products found')
-            }
+            return PriceResult(
+                price=None,
+                available=False,
+                meta=result,
+                error=result.get('error', 'No products found')
+            )
 
     except Exception as e:
-        return {"price": None, "available": False, "meta": None, "error": f"Integration error: {str(e)}"}
+        return PriceResult(price=None, available=False, meta=None, error=f"Integration error: {str(e)}")
 
 def _blinkit_search_item_fallback(session, item_text: str, lat: Optional[float], lon: Optional[float],
-                                 headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> Dict[str, Any]:
+                                 headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> PriceResult:
     """
     Original requests-based method (fallback when Playwright not available)
     Call Blinkit /v1/layout/search and parse minimum price for the item_text.
-    Returns: {"price": float|None, "available": bool, "meta": {...}, "error": str|None}
+    Returns: PriceResult(price=float|None, available=bool, meta={...}, error=str|None)
     """
-    url = "https://blinkit.com/v1/layout/search"
-    # Minimal payload - Blinkit's endpoint tolerates previous_search_query in many examples
-    payload = {
-        "applied_filters": None,
-        "previous_search_query": item_text,
-        "processed_rails": {},
-        "postback_meta": {"pageMeta": {"scrollMeta": [{"entitiesCount": 0}]}}
-    }
-    # include lat/lon in headers if available (some Blinkit endpoints accept them as headers)
-    if lat is not None:
-        headers = dict(headers)
-        headers.setdefault("lat", str(lat))
-    if lon is not None:
-        headers = dict(headers)
-        headers.setdefault("lon", str(lon))
+    payload = _search_payload(item_text)
+    headers = _with_location_headers(headers, lat, lon)
 
     try:
-        r = session.post(url, json=payload, headers=headers, timeout=timeout)
+        r = _post_prepared(session, _BLINKIT_REQ_TEMPLATE, payload, headers, timeout)
     except Exception as e:
-        return {"price": None, "available": False, "meta": None, "error": f"HTTP error: {e}"}
+        return PriceResult(price=None, available=False, meta=None, error=f"HTTP error: {e}")
 
-    # 403 handling
-    if r.status_code == 403:
-        sample = (r.text or "")[:400]
-        return {"price": None, "available": False, "meta": sample, "error": "403 Forbidden - endpoint refused request (auth/csrf/cors/cookies may be required)"}
+    failed = _check_status(r)
+    if failed:
+        return failed
 
-    if not r.ok:
-        return {"price": None, "available": False, "meta": r.text[:400], "error": f"HTTP {r.status_code}"}
-
-    # try parse JSON; handle non-JSON safely
+    # Large responses are streamed so only the name/price fields are kept in memory
+    if _ijson is None or int(r.headers.get("Content-Length") or 0) < _STREAM_MIN_BYTES:
+        return _result_from_body("Blinkit", item_text, r)
     try:
-        j = r.json()
-    except ValueError:
-        # server returned non-JSON (HTML error page or text) -> return snippet to help debug
-        return {"price": None, "available": False, "meta": r.text[:1000], "error": "Invalid JSON response from Blinkit (unexpected content)"}
-
-    # inspect response and find products/prices heuristically
-    products = _get_products_with_prices(j)
-    if not products:
-        return {"price": None, "available": False, "meta": j, "error": "No product nodes found in response"}
-
-    # match best candidate by name similarity + price
-    q_low = item_text.lower().strip()
-    scored = []
-    for p in products:
-        name = (p.get("name") or "").lower() if p.get("name") else ""
-        score = 0
-        if q_low and name:
-            if q_low in name:
-                score += 2
-            q_tokens = set(q_low.split())
-            name_tokens = set(name.split())
-            score += len(q_tokens.intersection(name_tokens))
-        price = p.get("min_price") if p.get("min_price") is not None else math.inf
-        scored.append((score, price, p))
-
-    # prefer high score, then low price
-    scored.sort(key=lambda x: (-x[0], x[1]))
-    best = scored[0][2]
-    best_price = best.get("min_price")
-    if best_price is None:
-        return {"price": None, "available": False, "meta": best.get("raw"), "error": "No numeric price parsed for matched product"}
-    # return best result
-    return {"price": float(best_price), "available": True, "meta": best.get("raw"), "error": None}
+        products = _stream_products(r)
+    except Exception as e:
+        return PriceResult(price=None, available=False, meta=None, error=f"Invalid JSON response from Blinkit ({e})")
+    finally:
+        r.close()
+    return _result_from_products(item_text, products, None)
 
 # --------- Instamart search call with Playwright integration -----------------
 
 def _instamart_search_item_playwright(item_text: str, lat: Optional[float], lon: Optional[float],
-                                      headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> Dict[str, Any]:
+                                      headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> PriceResult:
     """
     Simple direct call to your working Instamart API
     """
     if not PLAYWRIGHT_AVAILABLE or not INSTAMART_AVAILABLE:
-        return {"price": None, "available": False, "meta": None, "error": "Playwright API for Instamart not available"}
+        return PriceResult(price=None, available=False, meta=None, error="Playwright API for Instamart not available")
 
     try:
         # Use default coordinates if not provided
@@ -302,135 +499,236 @@ def _instamart_search_item_playwright(item_text: str, lat: Optional[float], lon:
         # Simple passthrough - if your API works standalone, just use its results directly
         if result.get('success') and result.get('best_match'):
             best_match = result['best_match']
-            return {
-                "price": best_match.get('price'),
-                "available": best_match.get('available', True),
-                "name": best_match.get('name', ''),
-                "quantity": best_match.get('quantity', ''),
-                "meta": best_match,
-                "error": None
-            }
+            return PriceResult(
+                price=best_match.get('price'),
+                available=best_match.get('available', True),
+                name=best_match.get('name', ''),
+                quantity=best_match.get('quantity', ''),
+                meta=best_match,
+                error=None
+            )
         else:
             # Return the exact error from your working API
-            return {
-                "price": None,
-                "available": False,
-                "meta": result,
-                "error": result.get('error', 'No products found')
-            }
+            return PriceResult(
+                price=None,
+                available=False,
+                meta=result,
+                error=result.get('error', 'No products found')
+            )
 
     except Exception as e:
-        return {"price": None, "available": False, "meta": None, "error": f"Integration error: {str(e)}"}
+        return PriceResult(price=None, available=False, meta=None, error=f"Integration error: {str(e)}")
 
 def _instamart_search_item_fallback(session, item_text: str, lat: Optional[float], lon: Optional[float],
-                                    headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> Dict[str, Any]:
+                                    headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> PriceResult:
     """
     Original requests-based method (fallback when Playwright not available)
     Call Instamart /v1/layout/search and parse minimum price for the item_text.
-    Returns: {"price": float|None, "available": bool, "meta": {...}, "error": str|None}
+    Returns: PriceResult(price=float|None, available=bool, meta={...}, error=str|None)
     """
-    url = "https://instamart.com/v1/layout/search"
-    # Minimal payload - Instamart's endpoint tolerates previous_search_query in many examples
-    payload = {
-        "applied_filters": None,
-        "previous_search_query": item_text,
-        "processed_rails": {},
-        "postback_meta": {"pageMeta": {"scrollMeta": [{"entitiesCount": 0}]}}
-    }
-    # include lat/lon in headers if available (some Instamart endpoints accept them as headers)
-    if lat is not None:
-        headers = dict(headers)
-        headers.setdefault("lat", str(lat))
-    if lon is not None:
-        headers = dict(headers)
-        headers.setdefault("lon", str(lon))
+    payload = _search_payload(item_text)
+    headers = _with_location_headers(headers, lat, lon)
 
     try:
-        r = session.post(url, json=payload, headers=headers, timeout=timeout)
+        r = _post_prepared(session, _INSTAMART_REQ_TEMPLATE, payload, headers, timeout)
     except Exception as e:
-        return {"price": None, "available": False, "meta": None, "error": f"HTTP error: {e}"}
-
-    # 403 handling
-    if r.status_code == 403:
-        sample = (r.text or "")[:400]
-        return {"price": None, "available": False, "meta": sample, "error": "403 Forbidden - endpoint refused request (auth/csrf/cors/cookies may be required)"}
+        return PriceResult(price=None, available=False, meta=None, error=f"HTTP error: {e}")
 
-    if not r.ok:
-        return {"price": None, "available": False, "meta": r.text[:400], "error": f"HTTP {r.status_code}"}
+    failed = _check_status(r)
+    if failed:
+        return failed
 
-    # try parse JSON; handle non-JSON safely
+    # Large responses are streamed so only the name/price fields are kept in memory
+    if _ijson is None or int(r.headers.get("Content-Length") or 0) < _STREAM_MIN_BYTES:
+        return _result_from_body("Instamart", item_text, r)
     try:
-        j = r.json()
-    except ValueError:
-        # server returned non-JSON (HTML error page or text) -> return snippet to help debug
-        return {"price": None, "available": False, "meta": r.text[:1000], "error": "Invalid JSON response from Instamart (unexpected content)"}
-
-    # inspect response and find products/prices heuristically
-    products = _get_products_with_prices(j)
-    if not products:
-        return {"price": None, "available": False, "meta": j, "error": "No product nodes found in response"}
-
-    # match best candidate by name similarity + price
-    q_low = item_text.lower().strip()
-    scored = []
-    for p in products:
-        name = (p.get("name") or "").lower() if p.get("name") else ""
-        score = 0
-        if q_low and name:
-            if q_low in name:
-                score += 2
-            q_tokens = set(q_low.split())
-            name_tokens = set(name.split())
-            score += len(q_tokens.intersection(name_tokens))
-        price = p.get("min_price") if p.get("min_price") is not None else math.inf
-        scored.append((score, price, p))
-
-    # prefer high score, then low price
-    scored.sort(key=lambda x: (-x[0], x[1]))
-    best = scored[0][2]
-    best_price = best.get("min_price")
-    if best_price is None:
-        return {"price": None, "available": False, "meta": best.get("raw"), "error": "No numeric price parsed for matched product"}
-    # return best result
-    return {"price": float(best_price), "available": True, "meta": best.get("raw"), "error": None}
+        products = _stream_products(r)
+    except Exception as e:
+        return PriceResult(price=None, available=False, meta=None, error=f"Invalid JSON response from Instamart ({e})")
+    finally:
+        r.close()
+    return _result_from_products(item_text, products, None)
 
 # Add missing Swiggy Instamart function
 def _swiggy_search_item_playwright(item_text: str, lat: Optional[float], lon: Optional[float],
-                                   headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> Dict[str, Any]:
+                                   headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> PriceResult:
     """
     Swiggy Instamart search using Playwright API (alias for Instamart)
     """
     return _instamart_search_item_playwright(item_text, lat, lon, headers, timeout, max_products)
 
+class _RateLimiter:
+    """Spaces successive requests to one site at least `interval` seconds apart (thread-safe)"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            fire_at = max(now, self.last + self.interval)
+            self.last = fire_at
+        if fire_at > now:
+            time.sleep(fire_at - now)
+
+# One limiter per site, so throttling Blinkit never delays Instamart
+_blinkit_limiter = _RateLimiter(2.0)
+_instamart_limiter = _RateLimiter(2.0)
+
+def _limiter_for(store: str) -> _RateLimiter:
+    return _blinkit_limiter if store.lower() == "blinkit" else _instamart_limiter
+
+def _search_store_playwright(store: str, item: str, lat: Optional[float], lon: Optional[float],
+                             headers: Dict[str, str], timeout: int, max_products: int) -> PriceResult:
+    """
+    Search one store for one item via its Playwright API and save the result to the DB.
+    Never raises; failures are returned as an error result.
+    """
+    if store.lower() == "blinkit":
+        search = _blinkit_search_item_playwright
+    elif store.lower() == "instamart":
+        search = _instamart_search_item_playwright
+    elif store == "Swiggy Instamart" and INSTAMART_AVAILABLE:
+        search = _swiggy_search_item_playwright
+    else:
+        # Fallback for other stores or when APIs not available
+        return PriceResult(
+            price=None, available=False, meta=None,
+            error=f"{store} scraping temporarily unavailable"
+        )
+
+    try:
+        _limiter_for(store).wait()
+        log.debug("    🔍 Calling Playwright API for %s on %s...", item, store)
+        result = search(item, lat, lon, headers, timeout, max_products)
+
+        # save to Supabase safely
+        _safe_save_to_db(store, item, result.get("price"), result.get("available"), result.get("meta"))
+
+        # Enhanced logging
+        if result.get("price"):
+            log.debug("    ✅ %s: %s - ₹%s", store, result.get('name', item), result['price'])
+        else:
+            log.debug("    ❌ %s: %s", store, result.get('error', 'Not found'))
+        return result
+
+    except Exception as e:
+        log.warning("    ❌ %s: Exception - %s", store, e)
+        return PriceResult(
+            price=None, available=False, meta=None,
+            error=f"Exception: {e}"
+        )
+
+# --------- Async fallback (httpx) -------------------------------------------
+
+async def _search_item_fallback_async(client, store: str, item_text: str, lat: Optional[float], lon: Optional[float],
+                                      headers: Dict[str, str]) -> PriceResult:
+    """Async twin of the *_search_item_fallback functions, sharing their request and parsing helpers"""
+    if store.lower() == "blinkit":
+        template, label = _BLINKIT_REQ_TEMPLATE, "Blinkit"
+    else:
+        template, label = _INSTAMART_REQ_TEMPLATE, "Instamart"
+
+    headers = _with_location_headers(headers, lat, lon)
+    try:
+        r = await client.post(template.url, content=_json_dumps(_search_payload(item_text)),
+                              headers={"Content-Type": "application/json", **headers})
+    except Exception as e:
+        return PriceResult(price=None, available=False, meta=None, error=f"HTTP error: {e}")
+
+    failed = _check_status(r)
+    if failed:
+        return failed
+    return _result_from_body(label, item_text, r)
+
+async def _batch_search_store(client, store: str, items: List[str], lat: Optional[float], lon: Optional[float],
+                              headers: Dict[str, str]) -> Dict[str, PriceResult]:
+    """
+    Search all items at one store in one batch. Neither layout/search endpoint takes
+    multiple queries, so the batch is the item requests issued together on one client.
+    """
+    results = await asyncio.gather(
+        *(_search_item_fallback_async(client, store, item, lat, lon, headers) for item in items)
+    )
+    return dict(zip(items, results))
+
+async def fetch_prices_for_list_real_async(items: List[str], stores: List[str], lat: Optional[float], lon: Optional[float],
+                                           headers: Dict[str, str], timeout: int = 60,
+                                           parallelism: int = 2) -> Dict[str, Dict[str, PriceResult]]:
+    """
+    Fallback-path search with one batch per store, all running concurrently over one httpx client.
+    Connections are capped at 2 x parallelism; unsupported stores get an error result.
+    """
+    batch_stores = [store for store in stores if store.lower() in ("blinkit", "instamart")]
+
+    limits = _httpx.Limits(max_connections=max(parallelism, 1) * 2)
+    async with _httpx.AsyncClient(http2=_HTTP2_AVAILABLE, limits=limits, timeout=timeout) as client:
+        batches = await asyncio.gather(
+            *(_batch_search_store(client, store, items, lat, lon, headers) for store in batch_stores)
+        )
+    by_store = dict(zip(batch_stores, batches))
+
+    price_results = {item: {} for item in items}
+    for item in items:
+        for store in stores:
+            if store not in by_store:
+                price_results[item][store] = PriceResult(price=None, available=False, meta=None, error=f"{store} scraping not implemented in this demo")
+                continue
+            res = by_store[store][item]
+            price_results[item][store] = res
+            _safe_save_to_db(store, item, res.get("price"), res.get("available"), res.get("meta"))
+            if res.get("price"):
+                log.debug("✅ %s from %s: ₹%s", item, store, res['price'])
+            else:
+                log.debug("❌ %s from %s: %s", item, store, res.get('error', 'Not found'))
+    return price_results
+
+def _event_loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
 # --------- Public function called by your UI -------------------------------
 
 def fetch_prices_for_list_real_sync(items: List[str], location: str = "mumbai", stores: List[str] = None,
                                    pincode: Optional[str] = None, timeout: int = 60, max_products: int = 10,
-                                   parallelism: int = 2) -> Dict[str, Dict[str, Dict[str, Any]]]:
+                                   parallelism: int = 2, request_timeout: Optional[int] = None) -> Dict[str, Dict[str, PriceResult]]:
     """
     Fetch prices for a list of items from multiple stores.
-    Fixed to prevent HTTP 400 errors by using sequential execution for Playwright.
+    With Playwright, items are searched one at a time and each item's stores concurrently.
+    timeout is used per request, except by the threaded fallback, which splits it across items;
+    request_timeout, when given, is the per-request timeout on every path.
     """
     if stores is None:
         stores = ["Blinkit"]
+    if request_timeout is not None:
+        timeout = request_timeout
+    split_timeout = request_timeout if request_timeout is not None else int(timeout / len(items) if len(items) else timeout)
+
+    # Results are keyed by item, so a repeated item only needs fetching once
+    items = list(dict.fromkeys(items))
 
-    print(f"🔍 Fetching prices for {len(items)} items from {len(stores)} stores...")
+    log.info("🔍 Fetching prices for %d items from %d stores...", len(items), len(stores))
 
     if PLAYWRIGHT_AVAILABLE:
-        print("✅ Using Playwright API (reliable method)")
+        log.info("✅ Using Playwright API (reliable method)")
     else:
-        print("⚠️ Playwright not available, using fallback requests method")
+        log.warning("⚠️ Playwright not available, using fallback requests method")
 
     # ... existing code for coordinates ...
     lat, lon = _geocode_location(location, pincode)
     if lat is not None and lon is not None:
-        print(f"📍 Using coordinates: {lat}, {lon} for location: {location}")
+        log.info("📍 Using coordinates: %s, %s for location: %s", lat, lon, location)
     else:
-        print(f"⚠️ Could not get coordinates for {location}, using defaults")
-        lat, lon = 28.7041, 77.1025  # Delhi defaults
+        log.warning("⚠️ Could not get coordinates for %s, using defaults", location)
+        lat, lon = _DEFAULT_COORDS["delhi"]
 
     price_results = {}
-    session = _create_session() if not PLAYWRIGHT_AVAILABLE else None
+    session = _HTTP if not PLAYWRIGHT_AVAILABLE else None
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
         "Accept": "application/json, text/plain, */*",
@@ -441,87 +739,46 @@ def fetch_prices_for_list_real_sync(items: List[str], location: str = "mumbai",
         "Upgrade-Insecure-Requests": "1",
     }
 
-    # FORCE SEQUENTIAL EXECUTION when using Playwright to prevent HTTP 400 errors
     if PLAYWRIGHT_AVAILABLE:
-        print("🔄 Using sequential execution for reliability...")
-        # Sequential execution to prevent browser instance conflicts
-        for item in items:
-            price_results[item] = {}
-            print(f"  Searching for: {item}")
-
-            for store in stores:
-                if store.lower() == "blinkit":
-                    try:
-                        print(f"    🔍 Calling Playwright API for {item}...")
-                        result = _blinkit_search_item_playwright(item, lat, lon, headers, timeout, max_products)
-                        price_results[item][store] = result
-
-                        # save to Supabase safely
-                        _safe_save_to_db(store, item, result.get("price"), result.get("available"), result.get("meta"))
-
-                        # Enhanced logging
-                        if result.get("price"):
-                            print(f"    📊 API result: success=True, error=None")
-                            print(f"    ✅ {store}: {result.get('name', item)} - ₹{result['price']}")
-                        else:
-                            print(f"    📊 API result: success=False, error={result.get('error')}")
-                            print(f"    ❌ {store}: {result.get('error', 'Not found')}")
-
-                    except Exception as e:
-                        print(f"    ❌ {store}: Exception - {str(e)}")
-                        price_results[item][store] = {
-                            "price": None, "available": False, "meta": None,
-                            "error": f"Exception: {e}"
-                        }
-                elif store.lower() == "instamart":
-                    try:
-                        print(f"    🔍 Calling Playwright API for {item}...")
-                        result = _instamart_search_item_playwright(item, lat, lon, headers, timeout, max_products)
-                        price_results[item][store] = result
-
-                        # save to Supabase safely
-                        _safe_save_to_db(store, item, result.get("price"), result.get("available"), result.get("meta"))
-
-                        # Enhanced logging
-                        if result.get("price"):
-                            print(f"    📊 API result: success=True, error=None")
-                            print(f"    ✅ {store}: {result.get('name', item)} - ₹{result['price']}")
-                        else:
-                            print(f"    📊 API result: success=False, error={result.get('error')}")
-                            print(f"    ❌ {store}: {result.get('error', 'Not found')}")
-
-                    except Exception as e:
-                        print(f"    ❌ {store}: Exception - {str(e)}")
-                        price_results[item][store] = {
-                            "price": None, "available": False, "meta": None,
-                            "error": f"Exception: {e}"
-                        }
-                else:
-                    # Try Swiggy Instamart with Playwright if available
-                    if store == "Swiggy Instamart" and INSTAMART_AVAILABLE:
-                        swiggy_result = _swiggy_search_item_playwright(item, lat, lon, headers, timeout, max_products)
-                        price_results[item][store] = swiggy_result
-                        _safe_save_to_db(store, item, swiggy_result.get("price"), swiggy_result.get("available"), swiggy_result.get("meta"))
-                    else:
-                        # Fallback for other stores or when APIs not available
-                        price_results[item][store] = {
-                            "price": None, "available": False, "meta": None,
-                            "error": f"{store} scraping temporarily unavailable"
-                        }
-
-            # Small delay between items to be respectful and prevent rate limiting
-            time.sleep(2.0)
+        log.info("🔄 Searching stores concurrently per item...")
+        # Each store's Playwright API drives its own browser against its own domain, so the
+        # stores for one item can run side by side. Each API keeps its browser warm between items
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            for item in items:
+                price_results[item] = {}
+                log.debug("  Searching for: %s", item)
+
+                futures = {
+                    store: ex.submit(_search_store_playwright, store, item, lat, lon, headers, timeout, max_products)
+                    for store in stores
+                }
+                # Collect in store order so results keep the caller's store ordering
+                for store, fut in futures.items():
+                    price_results[item][store] = fut.result()
     else:
         # Fallback method can still use parallel execution if needed
-        if len(items) <= 5:
+        batched = False
+        if _httpx is not None and not _event_loop_running():
+            # One batch per store, all multiplexed on one event loop
+            log.info("🚀 Using batched async fallback with up to %d connections...", max(parallelism, 1) * 2)
+            try:
+                price_results = asyncio.run(
+                    fetch_prices_for_list_real_async(items, stores, lat, lon, headers, timeout, parallelism)
+                )
+                batched = True
+            except Exception as e:
+                log.warning("⚠️ Batched fetch failed (%s), falling back to per-item requests", e)
+
+        if not batched and len(items) <= 5:
             # Sequential for small lists
             for item in items:
                 price_results[item] = {}
-                print(f"  Searching for: {item}")
+                log.debug("  Searching for: %s", item)
 
                 for store in stores:
                     if store.lower() == "blinkit":
                         try:
+                            _blinkit_limiter.wait()
                             result = _blinkit_search_item_fallback(session, item, lat, lon, headers, timeout, max_products)
                             price_results[item][store] = result
 
@@ -529,18 +786,19 @@ def fetch_prices_for_list_real_sync(items: List[str], location: str = "mumbai",
                             _safe_save_to_db(store, item, result.get("price"), result.get("available"), result.get("meta"))
 
                             if result.get("price"):
-                                print(f"    ✅ {store}: ₹{result['price']}")
+                                log.debug("    ✅ %s: ₹%s", store, result['price'])
                             else:
-                                print(f"    ❌ {store}: {result.get('error', 'Not found')}")
+                                log.debug("    ❌ %s: %s", store, result.get('error', 'Not found'))
 
                         except Exception as e:
-                            print(f"    ❌ {store}: Exception - {str(e)}")
-                            price_results[item][store] = {
-                                "price": None, "available": False, "meta": None,
-                                "error": f"Exception: {e}"
-                            }
+                            log.warning("    ❌ %s: Exception - %s", store, e)
+                            price_results[item][store] = PriceResult(
+                                price=None, available=False, meta=None,
+                                error=f"Exception: {e}"
+                            )
                     elif store.lower() == "instamart":
                         try:
+                            _instamart_limiter.wait()
                             result = _instamart_search_item_fallback(session, item, lat, lon, headers, timeout, max_products)
                             price_results[item][store] = result
 
@@ -548,16 +806,16 @@ def fetch_prices_for_list_real_sync(items: List[str], location: str = "mumbai",
                             _safe_save_to_db(store, item, result.get("price"), result.get("available"), result.get("meta"))
 
                             if result.get("price"):
-                                print(f"    ✅ {store}: ₹{result['price']}")
+                                log.debug("    ✅ %s: ₹%s", store, result['price'])
                             else:
-                                print(f"    ❌ {store}: {result.get('error', 'Not found')}")
+                                log.debug("    ❌ %s: %s", store, result.get('error', 'Not found'))
 
                         except Exception as e:
-                            print(f"    ❌ {store}: Exception - {str(e)}")
-                            price_results[item][store] = {
-                                "price": None, "available": False, "meta": None,
-                                "error": f"Exception: {e}"
-                            }
+                            log.warning("    ❌ %s: Exception - %s", store, e)
+                            price_results[item][store] = PriceResult(
+                                price=None, available=False, meta=None,
+                                error=f"Exception: {e}"
+                            )
                     else:
                         # Try Swiggy Instamart with Playwright if available
                         if store == "Swiggy Instamart" and INSTAMART_AVAILABLE:
@@ -565,15 +823,13 @@ def fetch_prices_for_list_real_sync(items: List[str], location: str = "mumbai",
                             price_results[item][store] = swiggy_result
                             _safe_save_to_db(store, item, swiggy_result.get("price"), swiggy_result.get("available"), swiggy_result.get("meta"))
                         else:
-                            price_results[item][store] = {
-                                "price": None, "available": False, "meta": None,
-                                "error": f"{store} scraping not implemented in this demo"
-                            }
-
-                time.sleep(1.5)
-        else:
+                            price_results[item][store] = PriceResult(
+                                price=None, available=False, meta=None,
+                                error=f"{store} scraping not implemented in this demo"
+                            )
+        elif not batched:
             # Parallel execution for larger lists (fallback method only)
-            print(f"🚀 Using parallel execution with {parallelism} workers...")
+            log.info("🚀 Using parallel execution with %d workers...", parallelism)
 
             tasks = {}
             with ThreadPoolExecutor(max_workers=min(parallelism, len(items))) as ex:
@@ -581,13 +837,13 @@ def fetch_prices_for_list_real_sync(items: List[str], location: str = "mumbai",
                     price_results[item] = {}
                     for store in stores:
                         if store.lower() == "blinkit":
-                            fut = ex.submit(_blinkit_search_item_fallback, session, item, lat, lon, headers, int(timeout/len(items) if len(items) else timeout), max_products)
+                            fut = ex.submit(_blinkit_search_item_fallback, session, item, lat, lon, headers, split_timeout, max_products)
                             tasks[fut] = (item, store)
                         elif store.lower() == "instamart":
-                            fut = ex.submit(_instamart_search_item_fallback, session, item, lat, lon, headers, int(timeout/len(items) if len(items) else timeout), max_products)
+                            fut = ex.submit(_instamart_search_item_fallback, session, item, lat, lon, headers, split_timeout, max_products)
                             tasks[fut] = (item, store)
                         else:
-                            price_results[item][store] = {"price": None, "available": False, "meta": None, "error": f"{store} scraping not implemented in this demo"}
+                            price_results[item][store] = PriceResult(price=None, available=False, meta=None, error=f"{store} scraping not implemented in this demo")
 
                 # collect
                 for fut in as_completed(tasks):
@@ -597,13 +853,13 @@ def fetch_prices_for_list_real_sync(items: List[str], location: str = "mumbai",
                         price_results[item][store] = res
 
                         if res.get("price"):
-                            print(f"✅ {item} from {store}: ₹{res['price']}")
+                            log.debug("✅ %s from %s: ₹%s", item, store, res['price'])
                         else:
-                            print(f"❌ {item} from {store}: {res.get('error', 'Not found')}")
+                            log.debug("❌ %s from %s: %s", item, store, res.get('error', 'Not found'))
 
                     except Exception as e:
-                        print(f"❌ {item} from {store}: Exception - {str(e)}")
-                        res = {"price": None, "available": False, "meta": None, "error": f"Exception: {e}"}
+                        log.warning("❌ %s from %s: Exception - %s", item, store, e)
+                        res = PriceResult(price=None, available=False, meta=None, error=f"Exception: {e}")
                         price_results[item][store] = res
 
                     time.sleep(0.1)
@@ -614,15 +870,13 @@ def fetch_prices_for_list_real_sync(items: List[str], location: str = "mumbai",
         for store_data in item_data.values()
         if store_data.get("price") is not None
     )
-    print(f"📊 Summary: Found prices for {total_found} items across all stores")
-
-    if session:
-        session.close()
+    log.info("📊 Summary: Found prices for %d items across all stores", total_found)
 
     return price_results
 
 # If run as script, quick smoke test (no secrets)
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("🧪 Testing integrated scrapers_real with Playwright...")
     print("Smoke test (no auth key required):")
     result = fetch_prices_for_list_real_sync(["milk", "bread"], "Delhi", ["Blinkit"], pincode=None, timeout=30)
@@ -1,225 +1,457 @@
 # scrapers_real.py  (debugging version - drop into your project)
+import asyncio
+import atexit
 import os
-import time
+import queue
+import threading
 import math
+import io
 import re
-import subprocess
 import json
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import pathlib
+from collections import deque
+from dataclasses import asdict, dataclass
+
+from curl_cffi import requests as curl_requests
+from curl_cffi.requests import AsyncSession
+from curl_cffi.requests.exceptions import Timeout as CurlTimeout
+
+# orjson parses the large layout responses several times faster; stdlib json otherwise
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# ijson (yajl2_c backend when built) lets us pull just the product lists out of the body
+try:
+    import ijson
+    _JSON_ERRORS: Tuple[type, ...] = (ValueError, ijson.JSONError)
+except ImportError:
+    ijson = None
+    _JSON_ERRORS = (ValueError,)
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+# Failed responses are dumped to DEBUG_LOG_DIR only when DEBUG_SCRAPER=1, by a background writer
+_DEBUG = os.getenv("DEBUG_SCRAPER") == "1"
+DEBUG_LOG_DIR = pathlib.Path("debug_logs")
+_debug_queue: "queue.Queue[Tuple[str, int, dict, str]]" = queue.Queue()
 
+# One in-process Chrome-impersonating session shared by every request, so keep-alive
+# connections and TLS sessions are reused instead of spawning curl_chrome130 per item
+_SESSION = curl_requests.Session(impersonate="chrome131", http_version="v2")
 
-DEBUG_LOG_DIR = pathlib.Path("debug_logs")
-DEBUG_LOG_DIR.mkdir(exist_ok=True)
+# Worker pool for the threaded path, shared across calls instead of rebuilt per request
+_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("SCRAPER_PARALLELISM", "6")),
+                               thread_name_prefix="blinkit-search")
+atexit.register(_EXECUTOR.shutdown)
+
+# Optional shared cache for geocodes and search results; without REDIS_URL geocodes
+# fall back to the in-process LRU and search results aren't cached
+REDIS_URL = os.getenv("REDIS_URL")
+_REDIS = redis.Redis.from_url(REDIS_URL) if redis and REDIS_URL else None
+GEO_CACHE_TTL = 24 * 3600
+RESULT_CACHE_TTL = 15 * 60
+
+# Optional {pincode: [lat, lon]} table of India Post PIN centroids, checked before Nominatim
+PINCODE_CENTROIDS_PATH = pathlib.Path(os.getenv(
+    "PINCODE_CENTROIDS", pathlib.Path(__file__).with_name("pincode_centroids.json")))
+
+
+_NUM_STRIP = re.compile(r"[^\d.\-]")
+_PIN_RE = re.compile(r"\d{4,6}")
+_FNAME_RE = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+@dataclass(slots=True)
+class ScrapeResult:
+    """Blinkit lookup result for one item"""
+    price: Optional[float]
+    available: bool
+    meta: Any = None
+    error: Optional[str] = None
+
+    def get(self, key: str, default=None):
+        """Dict-style access so callers written against the old result dicts keep working"""
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
 
 
 def _safe_float(x) -> Optional[float]:
     if x is None: return None
     if isinstance(x, (int, float)): return float(x)
     s = str(x)
-    s = re.sub(r"[^\d.\-]", "", s)
+    # Already-clean numbers like "49.00" skip the regex; anything else (or nan/inf) falls through to it
+    try:
+        v = float(s)
+        if math.isfinite(v):
+            return v
+    except ValueError:
+        pass
+    s = _NUM_STRIP.sub("", s)
     try:
         return float(s)
     except Exception:
         return None
 
 
-def _find_price_candidates(obj: Any, path: str = "") -> List[Tuple[str, float]]:
+_PRICE_KEYS = frozenset({"price", "mrp", "selling_price", "offer_price", "final_price", "amount", "value"})
+_NAME_KEYS = frozenset({"name", "title", "display_name", "label", "product_name"})
+
+
+def _find_price_candidates(obj: Any) -> List[float]:
     candidates = []
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            kl = k.lower()
-            if kl in ("price", "mrp", "selling_price", "offer_price", "final_price", "amount", "value"):
-                val = _safe_float(v)
-                if val is not None:
-                    candidates.append((f"{path}/{k}", val))
-            if isinstance(v, (dict, list)):
-                candidates += _find_price_candidates(v, f"{path}/{k}")
-    elif isinstance(obj, list):
-        for i, el in enumerate(obj):
-            candidates += _find_price_candidates(el, f"{path}[{i}]")
+    stack = deque([obj])
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for k, v in node.items():
+                # Most JSON keys are already lowercase; skip the extra string for those
+                if (k if k.islower() else k.lower()) in _PRICE_KEYS:
+                    val = _safe_float(v)
+                    if val is not None:
+                        candidates.append(val)
+                if isinstance(v, (dict, list)):
+                    stack.append(v)
+        elif isinstance(node, list):
+            stack.extend(node)
     return candidates
 
 
+def _extract(obj: Any) -> Tuple[List[float], List[str]]:
+    """One walk over obj collecting price-like values and name-like strings (in document order)"""
+    prices = []
+    names = []
+    # (key, value) pairs pushed in reverse so names come out in document order
+    stack = deque([(None, obj)])
+    while stack:
+        key, node = stack.pop()
+        if key is not None:
+            kl = key if key.islower() else key.lower()
+            if kl in _PRICE_KEYS:
+                val = _safe_float(node)
+                if val is not None:
+                    prices.append(val)
+            elif kl in _NAME_KEYS and isinstance(node, str):
+                names.append(node)
+        if isinstance(node, dict):
+            stack.extend(reversed(node.items()))
+        elif isinstance(node, list):
+            stack.extend((None, el) for el in reversed(node))
+    return prices, names
+
+
+_LIST_KEYS = ("entities", "items", "products", "vertical_cards", "results", "data", "payload")
+_LIST_ITEM_PREFIXES = {f"{key}.item": key for key in _LIST_KEYS}
+
+# Cleared once a response had products that streaming missed (its lists aren't top-level);
+# after that every body goes straight to the full parse instead of being read twice
+_STREAM_LISTS = ijson is not None
+
+
+def _product_from_element(el: Dict[str, Any]) -> Dict[str, Any]:
+    name = el.get("name") or el.get("title") or el.get("display_name") or (el.get("item") or {}).get("name")
+    prices = _find_price_candidates(el)
+    min_price = min(prices) if prices else None
+    return {"name": name, "prices": prices, "min_price": min_price, "raw": el}
+
+
+def _stream_list_products(body: bytes) -> List[Dict[str, Any]]:
+    """
+    Build only the elements of the top-level product lists while streaming body;
+    everything else in the layout response is skipped without creating objects.
+    """
+    found: Dict[str, List[Dict[str, Any]]] = {}
+    builder = None
+    item_prefix = list_key = None
+    for prefix, event, value in ijson.parse(io.BytesIO(body), use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event == "end_map" and prefix == item_prefix:
+                found.setdefault(list_key, []).append(_product_from_element(builder.value))
+                builder = None
+        elif event == "start_map" and prefix in _LIST_ITEM_PREFIXES:
+            item_prefix, list_key = prefix, _LIST_ITEM_PREFIXES[prefix]
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+    for key in _LIST_KEYS:
+        if found.get(key):
+            return found[key]
+    return []
+
+
 def _get_products_with_prices(json_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     products = []
-    list_keys = ["entities", "items", "products", "vertical_cards", "results", "data", "payload"]
-    for key in list_keys:
+    for key in _LIST_KEYS:
         node = json_data.get(key)
         if isinstance(node, list) and node:
-            for el in node:
-                if not isinstance(el, dict):
-                    continue
-                name = el.get("name") or el.get("title") or el.get("display_name") or (el.get("item") or {}).get("name")
-                prices = [p for (_, p) in _find_price_candidates(el)]
-                min_price = min(prices) if prices else None
-                products.append({"name": name, "prices": prices, "min_price": min_price, "raw": el})
+            products = [_product_from_element(el) for el in node if isinstance(el, dict)]
             if products:
                 return products
-    price_cands = _find_price_candidates(json_data)
-    name_cands = []
-    def _collect_names(o):
-        if isinstance(o, dict):
-            for k,v in o.items():
-                if isinstance(v, str) and k.lower() in ("name","title","display_name","label","product_name"):
-                    name_cands.append(v)
-                _collect_names(v)
-        elif isinstance(o, list):
-            for el in o:
-                _collect_names(el)
-    _collect_names(json_data)
+    price_cands, name_cands = _extract(json_data)
     if price_cands:
-        _, p = min(price_cands, key=lambda x: x[1])
+        p = min(price_cands)
         name = name_cands[0] if name_cands else None
         products.append({"name": name, "prices":[p], "min_price": p, "raw": json_data})
     return products
 
 
+@lru_cache(maxsize=None)
+def _pin_table() -> Dict[str, List[float]]:
+    try:
+        return _json_loads(PINCODE_CENTROIDS_PATH.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+
+@lru_cache(maxsize=1024)
+def _geocode_cached(location: str, pincode: str, timeout: int) -> Tuple[float, float]:
+    """Resolve a normalized (location, pincode) pair; raises on failure so misses aren't cached"""
+    key = f"geo:{location}:{pincode}"
+    if _REDIS is not None:
+        try:
+            cached = _REDIS.get(key)
+            if cached:
+                lat, lon = _json_loads(cached)
+                return lat, lon
+        except Exception:
+            pass
+
+    headers = {"User-Agent": "smart-grocery-cart/1.0"}
+    if pincode and _PIN_RE.fullmatch(pincode):
+        params = {"postalcode": pincode, "country": "India", "format": "json"}
+    else:
+        params = {"q": location, "country": "India", "format": "json", "limit": 1}
+
+    r = _SESSION.get("https://nominatim.openstreetmap.org/search",
+                     params=params, headers=headers, timeout=timeout)
+    if r.status_code != 200 or not r.content:
+        raise LookupError(f"geocoding failed with HTTP {r.status_code}")
+    data = _json_loads(r.content)
+    if not data:
+        raise LookupError(f"no geocoding result for {location!r} / {pincode!r}")
+    lat, lon = float(data[0]["lat"]), float(data[0]["lon"])
+
+    if _REDIS is not None:
+        try:
+            _REDIS.setex(key, GEO_CACHE_TTL, json.dumps([lat, lon]))
+        except Exception:
+            pass
+    return lat, lon
+
+
 def _geocode_location(location: str, pincode: Optional[str] = None, timeout: int = 8) -> Tuple[Optional[float], Optional[float]]:
+    if pincode and _PIN_RE.fullmatch(str(pincode).strip()):
+        centroid = _pin_table().get(str(pincode).strip())
+        if centroid:
+            return float(centroid[0]), float(centroid[1])
     try:
-        headers = ["User-Agent: smart-grocery-cart/1.0"]
-        if pincode and re.fullmatch(r"\d{4,6}", str(pincode)):
-            params = f"postalcode={pincode}&country=India&format=json"
-        else:
-            params = f"q={location}&country=India&format=json&limit=1"
-
-        # Use curl-impersonate for geocoding too
-        cmd = [
-            "curl_chrome130",  # or curl_chrome120, curl_firefox102, etc.
-            f"https://nominatim.openstreetmap.org/search?{params}",
-            "--timeout", str(timeout),
-            "--silent",
-            "--show-error"
-        ]
-        for header in headers:
-            cmd.extend(["-H", header])
-
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout+5)
-        if result.returncode == 0 and result.stdout:
-            data = json.loads(result.stdout)
-            if data:
-                return float(data[0]["lat"]), float(data[0]["lon"])
+        return _geocode_cached((location or "").strip().lower(), str(pincode or "").strip(), timeout)
     except Exception:
-        pass
-    return None, None
+        return None, None
 
 
 def _write_debug(item: str, status: int, headers: dict, snippet: str):
-    fname = DEBUG_LOG_DIR / f"{re.sub(r'[^a-zA-Z0-9_-]', '_', item)[:40]}_blinkit_debug.txt"
-    with fname.open("w", encoding="utf-8") as f:
-        f.write(f"Status: {status}\n\n")
-        f.write("Response headers:\n")
-        for k,v in headers.items():
-            f.write(f"{k}: {v}\n")
-        f.write("\n\nResponse snippet:\n")
-        f.write(snippet)
+    _debug_queue.put((item, status, headers, snippet))
 
 
-def _blinkit_search_item(item_text: str, lat: Optional[float], lon: Optional[float],
-                         headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> Dict[str, Any]:
-    url = "https://blinkit.com/v1/layout/search"
-    payload = {
-        "applied_filters": None,
-        "previous_search_query": item_text,
-        "processed_rails": {},
-        "postback_meta": {"pageMeta": {"scrollMeta": [{"entitiesCount": 0}]}}
-    }
+def _debug_writer():
+    DEBUG_LOG_DIR.mkdir(exist_ok=True)
+    while True:
+        batch = [_debug_queue.get()]
+        while not _debug_queue.empty():
+            batch.append(_debug_queue.get_nowait())
+        for item, status, headers, snippet in batch:
+            fname = DEBUG_LOG_DIR / f"{_FNAME_RE.sub('_', item)[:40]}_blinkit_debug.txt"
+            try:
+                with fname.open("w", encoding="utf-8") as f:
+                    f.write(f"Status: {status}\n\n")
+                    f.write("Response headers:\n")
+                    for k,v in headers.items():
+                        f.write(f"{k}: {v}\n")
+                    f.write("\n\nResponse snippet:\n")
+                    f.write(snippet)
+            except OSError:
+                pass
+            _debug_queue.task_done()
+
+
+if _DEBUG:
+    threading.Thread(target=_debug_writer, name="scraper-debug-writer", daemon=True).start()
+    # Let queued dumps reach disk before the interpreter exits
+    atexit.register(_debug_queue.join)
+
+
+BLINKIT_SEARCH_URL = "https://blinkit.com/v1/layout/search"
+# Only the query differs between searches, so the body is formatted from a fixed template
+_BLINKIT_PAYLOAD_TMPL = ('{"applied_filters":null,"previous_search_query":%s,"processed_rails":{},'
+                         '"postback_meta":{"pageMeta":{"scrollMeta":[{"entitiesCount":0}]}}}')
+
+
+def _blinkit_request(item_text: str, lat: Optional[float], lon: Optional[float],
+                     headers: Dict[str, str]) -> Tuple[bytes, Dict[str, str]]:
+    payload = (_BLINKIT_PAYLOAD_TMPL % json.dumps(item_text)).encode("utf-8")
 
-    # Build curl-impersonate command
-    cmd = [
-        "curl_chrome130",  # Use Chrome 130 impersonation
-        url,
-        "-X", "POST",
-        "--timeout", str(timeout),
-        "--silent",
-        "--show-error",
-        "--write-out", "HTTP_CODE:%{http_code}",  # Get status code
-        "--data", json.dumps(payload)
-    ]
-
-    # Add headers
     local_headers = dict(headers)
     if lat is not None:
         local_headers["lat"] = str(lat)
     if lon is not None:
         local_headers["lon"] = str(lon)
+    return payload, local_headers
 
-    for key, value in local_headers.items():
-        cmd.extend(["-H", f"{key}: {value}"])
 
+def _blinkit_search_item(item_text: str, lat: Optional[float], lon: Optional[float],
+                         headers: Dict[str, str], timeout: int = 20, max_products: int = 5) -> ScrapeResult:
+    payload, local_headers = _blinkit_request(item_text, lat, lon, headers)
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout+10)
-
-        # Parse response
-        if result.returncode != 0:
-            error_msg = result.stderr or "curl command failed"
-            return {"price": None, "available": False, "meta": None, "error": f"curl error: {error_msg}"}
-
-        output = result.stdout
-
-        # Extract status code and response body
-        if "HTTP_CODE:" in output:
-            parts = output.rsplit("HTTP_CODE:", 1)
-            response_body = parts[0]
-            status_code = int(parts[1].strip()) if parts[1].strip().isdigit() else 0
-        else:
-            response_body = output
-            status_code = 200  # Assume OK if no status code
-
-    except subprocess.TimeoutExpired:
-        return {"price": None, "available": False, "meta": None, "error": "Request timeout"}
+        r = _SESSION.post(BLINKIT_SEARCH_URL, data=payload, headers=local_headers, timeout=timeout)
+    except CurlTimeout:
+        return ScrapeResult(price=None, available=False, meta=None, error="Request timeout")
     except Exception as e:
-        return {"price": None, "available": False, "meta": None, "error": f"curl execution error: {e}"}
+        return ScrapeResult(price=None, available=False, meta=None, error=f"curl error: {e}")
+    return _blinkit_result(item_text, r)
+
+
+async def _blinkit_search_item_async(session, item_text: str, lat: Optional[float], lon: Optional[float],
+                                     headers: Dict[str, str], timeout: int = 20) -> ScrapeResult:
+    payload, local_headers = _blinkit_request(item_text, lat, lon, headers)
+    try:
+        r = await session.post(BLINKIT_SEARCH_URL, data=payload, headers=local_headers, timeout=timeout)
+    except CurlTimeout:
+        return ScrapeResult(price=None, available=False, meta=None, error="Request timeout")
+    except Exception as e:
+        return ScrapeResult(price=None, available=False, meta=None, error=f"curl error: {e}")
+    return _blinkit_result(item_text, r)
+
+
+def _failed_response(item_text: str, r, error: str) -> ScrapeResult:
+    # The body stays bytes end to end; only this short snippet is ever decoded to text
+    snippet = r.content[:2000].decode("utf-8", "replace")
+    if _DEBUG:
+        _write_debug(item_text, r.status_code, dict(r.headers), snippet)
+    return ScrapeResult(price=None, available=False, meta=snippet, error=error)
+
+
+def _blinkit_result(item_text: str, r) -> ScrapeResult:
+    """Turn a Blinkit search response into a price result for item_text"""
+    status_code = r.status_code
+    response_body = r.content
 
     # Handle non-OK status codes
     if status_code == 403:
-        snippet = response_body[:2000]
-        _write_debug(item_text, status_code, {}, snippet)
-        return {"price": None, "available": False, "meta": snippet, "error": "403 Forbidden - auth/cookies required (see debug log)"}
+        return _failed_response(item_text, r, "403 Forbidden - auth/cookies required (see debug log)")
 
     if status_code >= 400:
-        snippet = response_body[:2000]
-        _write_debug(item_text, status_code, {}, snippet)
-        return {"price": None, "available": False, "meta": snippet, "error": f"HTTP {status_code} - see debug log"}
+        return _failed_response(item_text, r, f"HTTP {status_code} - see debug log")
 
-    # Parse JSON response
+    # Parse JSON response, streaming just the product lists when ijson is available
+    global _STREAM_LISTS
+    j = None
     try:
-        j = json.loads(response_body)
-    except ValueError:
-        snippet = response_body[:2000]
-        _write_debug(item_text, status_code, {}, snippet)
-        return {"price": None, "available": False, "meta": snippet, "error": "Invalid JSON response (see debug log)"}
+        streamed = _STREAM_LISTS
+        products = _stream_list_products(response_body) if streamed else []
+        if not products:
+            j = _json_loads(response_body)
+            products = _get_products_with_prices(j)
+            if streamed and products:
+                _STREAM_LISTS = False
+    except _JSON_ERRORS:
+        return _failed_response(item_text, r, "Invalid JSON response (see debug log)")
 
-    products = _get_products_with_prices(j)
     if not products:
-        return {"price": None, "available": False, "meta": j, "error": "No product nodes found in JSON"}
+        return ScrapeResult(price=None, available=False, meta=j, error="No product nodes found in JSON")
 
     q_low = item_text.lower().strip()
-    scored = []
-    for p in products:
-        name = (p.get("name") or "").lower() if p.get("name") else ""
+    q_tokens = frozenset(q_low.split())
+
+    def _rank(p: Dict[str, Any]) -> Tuple[int, float]:
+        name = p["name"].lower() if p.get("name") else ""
         score = 0
         if q_low and name:
             if q_low in name:
                 score += 2
-            q_tokens = set(q_low.split())
-            name_tokens = set(name.split())
-            score += len(q_tokens.intersection(name_tokens))
+            # A token can only match if it occurs as a substring, so skip splitting names that share none
+            if any(t in name for t in q_tokens):
+                score += len(q_tokens.intersection(name.split()))
         price = p.get("min_price") if p.get("min_price") is not None else math.inf
-        scored.append((score, price, p))
-    scored.sort(key=lambda x: (-x[0], x[1]))
-    best = scored[0][2]
+        return -score, price
+
+    # Only the best match is used, so a single min() pass replaces the full sort
+    best = min(products, key=_rank)
     best_price = best.get("min_price")
     if best_price is None:
-        return {"price": None, "available": False, "meta": best.get("raw"), "error": "No numeric price parsed for matched product"}
-    return {"price": float(best_price), "available": True, "meta": best.get("raw"), "error": None}
+        return ScrapeResult(price=None, available=False, meta=best.get("raw"), error="No numeric price parsed for matched product")
+    return ScrapeResult(price=float(best_price), available=True, meta=best.get("raw"), error=None)
+
+
+def _result_cache_key(item_text: str, lat: Optional[float], lon: Optional[float]) -> str:
+    # ~100m buckets so nearby users share entries
+    lat_key = round(lat, 3) if lat is not None else ""
+    lon_key = round(lon, 3) if lon is not None else ""
+    return f"blk:{item_text.lower().strip()}:{lat_key}:{lon_key}"
+
+
+def _cached_result(key: str) -> Optional[ScrapeResult]:
+    try:
+        hit = _REDIS.get(key)
+        return ScrapeResult(**_json_loads(hit)) if hit else None
+    except Exception:
+        return None
+
+
+def _cache_result(key: str, result: ScrapeResult, ttl: int):
+    # Only successful lookups are cached so failures are retried on the next call
+    if not result.available:
+        return
+    try:
+        _REDIS.setex(key, ttl, _json_dumps(asdict(result)))
+    except Exception:
+        pass
+
+
+async def _fetch_prices_async(jobs: List[Tuple[str, str]], lat: Optional[float], lon: Optional[float],
+                              headers: Dict[str, str], timeout: int, parallelism: int) -> List[Any]:
+    """Run every (item, store) Blinkit search on one event loop, at most `parallelism` in flight"""
+    sem = asyncio.Semaphore(max(1, parallelism))
+
+    async def _bounded(item: str) -> ScrapeResult:
+        async with sem:
+            return await _blinkit_search_item_async(session, item, lat, lon, headers, timeout)
+
+    # HTTP/2 lets the concurrent searches share one connection and TLS handshake as streams
+    async with AsyncSession(impersonate="chrome131", http_version="v2", max_clients=max(1, parallelism)) as session:
+        return await asyncio.gather(*(_bounded(item) for item, _ in jobs), return_exceptions=True)
+
+
+def _event_loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
 
 
 def fetch_prices_for_list_real_sync(items: List[str], location: str, stores: List[str],
                                     pincode: Optional[str] = None,
                                     timeout: int = 90, max_products: int = 10,
-                                    parallelism: int = 3) -> Dict[str, Dict[str, Any]]:
+                                    parallelism: int = 3,
+                                    cache_ttl: int = RESULT_CACHE_TTL) -> Dict[str, Dict[str, ScrapeResult]]:
+    """cache_ttl is in seconds; 0 bypasses the Redis result cache and forces fresh lookups"""
     lat, lon = _geocode_location(location, pincode)
     if lat is None or lon is None:
         if pincode:
@@ -235,28 +467,54 @@ def fetch_prices_for_list_real_sync(items: List[str], location: str, stores: Lis
     if auth:
         headers["auth_key"] = auth
 
-    price_results: Dict[str, Dict[str, Any]] = {}
-    tasks = {}
-    with ThreadPoolExecutor(max_workers=parallelism) as ex:
-        for item in items:
-            price_results[item] = {}
-            for store in stores:
-                if store.lower() == "blinkit":
-                    fut = ex.submit(_blinkit_search_item, item, lat, lon, headers, int(max(5, timeout//max(1,len(items)))), max_products)
-                    tasks[fut] = (item, store)
+    use_cache = _REDIS is not None and cache_ttl > 0
+    price_results: Dict[str, Dict[str, ScrapeResult]] = {}
+    jobs: List[Tuple[str, str]] = []
+    for item in items:
+        price_results[item] = {}
+        for store in stores:
+            if store.lower() == "blinkit":
+                cached = _cached_result(_result_cache_key(item, lat, lon)) if use_cache else None
+                if cached is not None:
+                    price_results[item][store] = cached
                 else:
-                    price_results[item][store] = {"price": None, "available": False, "meta": None, "error": f"{store} not implemented"}
-        for fut in as_completed(tasks):
-            item, store = tasks[fut]
-            try:
-                res = fut.result()
-            except Exception as e:
-                res = {"price": None, "available": False, "meta": None, "error": f"Exception: {e}"}
+                    jobs.append((item, store))
+            else:
+                price_results[item][store] = ScrapeResult(price=None, available=False, meta=None, error=f"{store} not implemented")
+    per_item_timeout = int(max(5, timeout//max(1,len(items))))
+
+    # asyncio.run() can't nest inside a running loop (e.g. called from async code); use threads there
+    if not _event_loop_running():
+        results = asyncio.run(_fetch_prices_async(jobs, lat, lon, headers, per_item_timeout, parallelism))
+        for (item, store), res in zip(jobs, results):
+            if isinstance(res, Exception):
+                res = ScrapeResult(price=None, available=False, meta=None, error=f"Exception: {res}")
             price_results[item][store] = res
-            time.sleep(0.05)
+            if use_cache:
+                _cache_result(_result_cache_key(item, lat, lon), res, cache_ttl)
+        return price_results
+
+    # The shared pool is sized for every caller; the semaphore keeps this call to `parallelism`
+    # requests in flight, like the async path
+    slots = threading.Semaphore(max(1, parallelism))
+    tasks = {}
+    for item, store in jobs:
+        slots.acquire()
+        fut = _EXECUTOR.submit(_blinkit_search_item, item, lat, lon, headers, per_item_timeout, max_products)
+        fut.add_done_callback(lambda _: slots.release())
+        tasks[fut] = (item, store)
+    for fut in as_completed(tasks):
+        item, store = tasks[fut]
+        try:
+            res = fut.result()
+        except Exception as e:
+            res = ScrapeResult(price=None, available=False, meta=None, error=f"Exception: {e}")
+        price_results[item][store] = res
+        if use_cache:
+            _cache_result(_result_cache_key(item, lat, lon), res, cache_ttl)
     return price_results
 
 
 if __name__ == "__main__":
-    print("Debug smoke test with curl-impersonate")
+    print("Debug smoke test with curl_cffi")
     print(fetch_prices_for_list_real_sync(["milk 1l","eggs 12"], "Delhi", ["Blinkit"], pincode=None, timeout=20))
@@ -15,7 +15,7 @@ def simple_orchestrate(items: List[str], city: str, vendors: List[str], method:
     """
     Simplified orchestrator that returns UI-compatible format
     """
-    logger.info(f"Starting orchestration for items: {items}")
+    logger.info("Starting orchestration for items: %s", items)
 
     try:
         # Try to import and use the tools
@@ -24,39 +24,42 @@ def simple_orchestrate(items: List[str], city: str, vendors: List[str], method:
         price_checker = PriceCheckerTool()
         optimizer = OptimizerTool()
 
-        price_results = {}
+        # Step 1: Get prices for all items in one batched call
+        logger.info("Checking prices for: %s", items)
+
+        query = json.dumps({
+            "items": items,
+            "location": city,
+            "stores": vendors,
+            "cache_ttl": 0  # Disable cache to force fresh lookup
+        })
+
+        try:
+            result_str = price_checker._run(query)
+            fetched = json.loads(result_str)
+        except Exception as e:
+            logger.error("Error getting prices for %s: %s", items, e)
+            fetched = {}
 
-        # Step 1: Get prices with timeout and error handling
+        price_results = {}
         for item in items:
-            logger.info(f"Checking prices for: {item}")
-
-            query = json.dumps({
-                "item": item,
-                "location": city,
-                "stores": vendors,
-                "cache_ttl": 0  # Disable cache to force fresh lookup
-            })
-
-            try:
-                result_str = price_checker._run(query)
-                item_prices = json.loads(result_str)
-                price_results[item] = item_prices
-                logger.info(f"Got prices for {item}")
-
-                # Check if we got any valid prices
-                has_valid_price = any(
-                    store_info.get('available') and store_info.get('price') is not None
-                    for store_info in item_prices.values()
-                )
-
-                if not has_valid_price:
-                    logger.warning(f"No valid prices found for {item}")
-
-            except Exception as e:
-                logger.error(f"Error getting prices for {item}: {e}")
+            item_prices = fetched.get(item)
+            if not isinstance(item_prices, dict):
                 price_results[item] = {store: {"price": None, "available": False, "name": None} for store in vendors}
+                continue
+            price_results[item] = item_prices
+            logger.info("Got prices for %s", item)
+
+            # Check if we got any valid prices
+            has_valid_price = any(
+                store_info.get('available') and store_info.get('price') is not None
+                for store_info in item_prices.values()
+            )
+
+            if not has_valid_price:
+                logger.warning("No valid prices found for %s", item)
 
-        logger.info(f"Final price_results collected")
+        logger.info("Final price_results collected")
 
         # Step 2: Optimize if we have any valid prices
         has_any_prices = any(
@@ -86,7 +89,7 @@ def simple_orchestrate(items: List[str], city: str, vendors: List[str], method:
         result_str = optimizer._run(opt_query)
         optimized = json.loads(result_str)
 
-        logger.info(f"Optimization completed")
+        logger.info("Optimization completed")
 
         # Transform result to UI-compatible format
         assigned_cart = {}
@@ -130,7 +133,7 @@ def simple_orchestrate(items: List[str], city: str, vendors: List[str], method:
         }
 
     except ImportError as e:
-        logger.error(f"Import error: {e}")
+        logger.error("Import error: %s", e)
         # Return UI-compatible error format
         return {
             "price_results": {},
@@ -140,7 +143,7 @@ def simple_orchestrate(items: List[str], city: str, vendors: List[str], method:
             "summary": f"Import error: {e}"
         }
     except Exception as e:
-        logger.exception(f"Orchestration failed: {e}")
+        logger.exception("Orchestration failed: %s", e)
         # Return UI-compatible error format
         return {
             "price_results": {},
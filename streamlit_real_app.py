@@ -1,11 +1,18 @@
 # streamlit_real_app_fixed.py - LangChain orchestrator integrated (call only on button click)
 import streamlit as st
-import pandas as pd
-from optimizer import greedy_optimize, ilp_optimize
+import numpy as np
+from optimizer import greedy_optimize_matrix, ilp_optimize, price_matrix
+import asyncio
+import hashlib
 import json
 import time
-from agent_orchestrator import orchestrate
-from ai_agent_with_llm_summary import GroceryCartAIAgent
+from collections import Counter
+
+# orjson writes the summary download straight to bytes; stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 st.set_page_config(
     page_title="Smart Grocery Cart - AI Powered",
@@ -14,26 +21,226 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize session state variables
-if 'run_comparison' not in st.session_state:
-    st.session_state.run_comparison = False
-if 'comparison_done' not in st.session_state:
-    st.session_state.comparison_done = False
-if 'price_results' not in st.session_state:
-    st.session_state.price_results = {}
-if 'optimize_cart' not in st.session_state:
-    st.session_state.optimize_cart = False
-if 'assigned_cart' not in st.session_state:
-    st.session_state.assigned_cart = {}
-if 'summary' not in st.session_state:
-    st.session_state.summary = ""
-if 'ai_summary' not in st.session_state:
-    st.session_state.ai_summary = ""
-if 'use_ai_agent' not in st.session_state:
-    st.session_state.use_ai_agent = True
-
-# Custom CSS for better UI
-st.markdown("""
+@st.cache_resource(show_spinner=False)
+def get_ai_agent():
+    """One initialized AI agent (tools + LLM client) shared across reruns and sessions"""
+    # LangChain/OpenAI are only imported once a comparison actually needs the agent
+    from ai_agent_with_llm_summary import GroceryCartAIAgent
+    agent = GroceryCartAIAgent()
+    agent._get_agent_lazy()
+    return agent
+
+@st.cache_resource(show_spinner=False)
+def get_working_orchestrate():
+    """Fallback orchestrator, imported once per process"""
+    from working_orchestrator import working_orchestrate
+    return working_orchestrate
+
+class UncachedFetch(Exception):
+    """Raised out of fetch_prices so Streamlit doesn't cache a failed scrape; carries the result"""
+
+    def __init__(self, out):
+        super().__init__("price fetch failed")
+        self.out = out
+
+def fetch_failed(out, items):
+    """True for errored results, results with no usable price, or ones where every item fell back"""
+    if not isinstance(out, dict) or out.get("error"):
+        return True
+    if items and set(items) <= set(out.get("fallback_items") or ()):
+        return True
+    price_data = out.get("raw_price_data") or out.get("price_results") or {}
+    return not any(
+        isinstance(info, dict) and info.get("price") is not None and info.get("available", True)
+        for stores_data in price_data.values() if isinstance(stores_data, dict)
+        for info in stores_data.values()
+    )
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_prices(items_key, city, vendors_key, use_ai):
+    """
+    Run the AI agent (or the working orchestrator fallback) for a shopping list.
+    Keyed on sorted item/vendor tuples so re-clicking with the same inputs reuses the last scrape.
+    Failed results are raised as UncachedFetch instead, so the next click scrapes again.
+    """
+    out = run_fetch(list(items_key), city, list(vendors_key), use_ai)
+    if fetch_failed(out, items_key):
+        raise UncachedFetch(out)
+    return out
+
+def run_fetch(items, city, vendors, use_ai):
+    """The uncached body of fetch_prices"""
+    ai_agent = get_ai_agent() if use_ai else None
+
+    # Use AI Agent with LLM summarization if available
+    if ai_agent is not None and (ai_agent.agent is not None or ai_agent.llm is not None):
+        st.info("✅ Using AI Agent with OpenAI for intelligent optimization")
+        try:
+            return ai_agent.find_optimal_cart(items=items, city=city, vendors=vendors)
+        except Exception as e:
+            if "quota" in str(e).lower() or "429" in str(e):
+                st.warning("🚫 API quota exceeded - switching to working orchestrator")
+            else:
+                st.warning(f"⚠️ AI agent failed: {e} - switching to working orchestrator")
+    else:
+        # Fallback to working orchestrator only if no AI agent at all
+        st.warning("🤖 AI agent not available, using working orchestrator")
+
+    return orchestrate_by_vendor(items, city, vendors)
+
+async def scrape_all(items, city, vendors):
+    """Run the working orchestrator for every vendor at once, one worker thread each"""
+    working_orchestrate = get_working_orchestrate()
+    # Partial single-vendor carts aren't persisted; orchestrate_by_vendor saves the merged one
+    tasks = [asyncio.to_thread(working_orchestrate, items, city, [vendor], method="greedy", persist=False)
+             for vendor in vendors]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+def orchestrate_by_vendor(items, city, vendors):
+    """
+    Scrape all vendors concurrently and merge them into one working_orchestrate-style result.
+    Per-vendor carts can't simply be combined, so the merged prices are re-optimized here.
+    """
+    if len(vendors) <= 1:
+        return get_working_orchestrate()(items=items, city=city, vendors=vendors, method="greedy")
+
+    results = asyncio.run(scrape_all(items, city, vendors))
+
+    price_results = {item: {} for item in items}
+    notes = []
+    # An item only counts as fallen back if no vendor scraped a real price for it
+    fallback_items = set(items)
+    for vendor, out in zip(vendors, results):
+        if isinstance(out, Exception) or not isinstance(out, dict):
+            for item in items:
+                price_results[item][vendor] = {"price": None, "available": False, "name": None}
+            continue
+        fallback_items &= set(out.get("fallback_items", ()))
+        for item, stores_data in (out.get("price_results") or {}).items():
+            price_results.setdefault(item, {}).update(stores_data)
+        if out.get("note"):
+            notes.append(out["note"])
+
+    assigned_cart = {}
+    total_paise = 0  # summed as whole paise so float error can't build up
+    unavailable = []
+    for item, assignment in greedy_optimize_matrix(*price_matrix(price_results)).items():
+        if assignment is None:
+            unavailable.append(item)
+        else:
+            store, price = assignment
+            assigned_cart.setdefault(store, []).append({"item": item, "price": price})
+            total_paise += int(round(price * 100))
+
+    total = total_paise / 100
+    from working_orchestrator import save_orchestration
+    save_orchestration(items, city, vendors, assigned_cart, total, unavailable)
+
+    return {
+        "price_results": price_results,
+        "assigned_cart": assigned_cart,
+        "total": total,
+        "unavailable": unavailable,
+        "summary": f"Found items across {len(assigned_cart)} stores. Total: ₹{total:.2f}",
+        "item_details": [],
+        "fallback_items": [item for item in items if item in fallback_items],
+        "note": notes[0] if notes else ""
+    }
+
+PRICE_FRAME_COLUMNS = ["item", "store", "price", "available", "name"]
+CART_COLUMNS = ["Product", "Best Store", "Price", "Status"]
+
+def price_frame(price_results):
+    """Flatten price_results into one long-form row per (item, store)"""
+    import pandas as pd
+    return pd.DataFrame.from_records(
+        [(item, store, store_data.get("price"), store_data.get("available", True), store_data.get("name"))
+         for item, stores_data in price_results.items() if isinstance(stores_data, dict)
+         for store, store_data in stores_data.items()],
+        columns=PRICE_FRAME_COLUMNS
+    )
+
+# Bound once and applied column-wise with Series.map
+format_price = "₹{:.2f}".format
+
+# Export payloads are rebuilt only when the cart changes, not on every rerun
+@st.cache_data(show_spinner=False)
+def cart_csv(df):
+    return df.to_csv(index=False).encode("utf-8")
+
+@st.cache_data(show_spinner=False)
+def cart_summary_json(summary):
+    if orjson is not None:
+        return orjson.dumps(summary, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(summary, separators=(",", ":")).encode("utf-8")
+
+@st.cache_data(show_spinner=False)
+def build_comparison_df(price_results, selected_stores):
+    """
+    Per-item comparison table (price, status and product name for each selected store),
+    cached so reruns from unrelated widgets don't rebuild it. Returns (df, products_found).
+    """
+    import pandas as pd
+
+    # One long-form (item, store) frame pivoted into per-store columns
+    compared_items = [item for item, stores_data in price_results.items() if isinstance(stores_data, dict)]
+    df_long = price_frame(price_results)
+    df_long = df_long[df_long["store"].isin(selected_stores)].copy()
+    found = df_long["price"].notna() & df_long["available"].astype(bool)
+    total_products_found = int(found.sum())
+
+    df_long["Price"] = "N/A"
+    df_long.loc[found, "Price"] = df_long.loc[found, "price"].map(format_price)
+    df_long["Status"] = found.map({True: "✅ Available", False: "❌ Not available"})
+    names = df_long.loc[found & df_long["name"].astype(bool), "name"].astype(str)
+    df_long["Product"] = names.where(names.str.len() <= 40, names.str[:40] + "...")
+
+    fields = ["Price", "Status", "Product"]
+    df_wide = df_long.pivot(index="item", columns="store", values=fields).reindex(
+        index=compared_items, columns=pd.MultiIndex.from_product([fields, selected_stores]))
+    # Collect every column first and build the frame in one go
+    columns = {"Product": compared_items}
+    for store in selected_stores:
+        columns[f"{store} Price"] = df_wide[("Price", store)].fillna("N/A").to_numpy()
+        columns[f"{store} Status"] = df_wide[("Status", store)].fillna("❌ No Data").to_numpy()
+        if df_wide[("Product", store)].notna().any():
+            columns[f"{store} Product"] = df_wide[("Product", store)].to_numpy()
+    found_counts = found.groupby(df_long["item"]).sum().reindex(compared_items, fill_value=0)
+    columns["Found In"] = (found_counts.astype(int).astype(str) + f"/{len(selected_stores)} stores").to_numpy()
+    return pd.DataFrame(columns), total_products_found
+
+# Raw output shown in debug mode, capped so big carts don't flood the page
+DEBUG_JSON_LIMIT = 20000
+
+@st.cache_data(show_spinner=False)
+def debug_json(out):
+    text = json.dumps(out, indent=2, default=str)
+    if len(text) > DEBUG_JSON_LIMIT:
+        text = text[:DEBUG_JSON_LIMIT] + f"\n... truncated ({len(text) - DEBUG_JSON_LIMIT} more characters)"
+    return text
+
+def set_assigned_cart(assigned_cart):
+    """
+    Store a cart in session state together with its {item: (store, price)} view, so reruns
+    don't re-transform it. Accepts orchestrator carts ({store: [{"item", "price"}, ...]})
+    and optimizer output ({item: (store, price) or None}).
+    """
+    final_assigned = {}
+    for key, value in (assigned_cart or {}).items():
+        if isinstance(value, list):
+            for item_info in value:
+                if isinstance(item_info, dict):
+                    item_name = item_info.get('item', '')
+                    price = item_info.get('price', 0)
+                    if item_name and price is not None:
+                        final_assigned[item_name] = (key, price)
+        elif isinstance(value, tuple) and len(value) == 2 and value[1] is not None:
+            final_assigned[key] = value
+    ss.assigned_cart = assigned_cart
+    ss.final_assigned = final_assigned
+
+# Static page chrome, built once at import rather than on every rerun
+HEADER_HTML = """
 <style>
     .main-header {
         text-align: center;
@@ -53,9 +260,47 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+""" + '<h1 class="main-header">🛒 Smart Grocery Cart - Real Time Price Comparison</h1>'
 
-st.markdown('<h1 class="main-header">🛒 Smart Grocery Cart - Real Time Price Comparison</h1>', unsafe_allow_html=True)
+FOOTER_HTML = """
+<div style='text-align: center; color: #666; padding: 1rem;'>
+    <p>🛒 Smart Grocery Cart - Compare prices across grocery delivery platforms</p>
+    <p style='font-size: 0.8rem;'>⚠️ Prices are fetched in real-time and may vary. Always verify on the store website.</p>
+    <p style='font-size: 0.7rem;'>Powered by Playwright and LangChain orchestrator</p>
+</div>
+"""
+
+# Predefined quick lists
+QUICK_LISTS = {
+    "Test Items": ["milk", "bread"],  # Simple test
+    "Basic Essentials": ["Milk 1L", "Bread", "Eggs 12", "Rice 5kg", "Oil 1L"],
+    "Breakfast Items": ["Milk 1L", "Bread", "Butter", "Jam", "Cornflakes"],
+    "Cooking Basics": ["Rice 5kg", "Dal 1kg", "Oil 1L", "Salt", "Sugar 1kg"],
+    "Snacks & Beverages": ["Biscuits", "Tea", "Coffee", "Namkeen", "Cold Drink"]
+}
+
+# Text-area contents for each quick list, joined once at import
+QUICK_LIST_TEXT = {name: "\n".join(list_items) for name, list_items in QUICK_LISTS.items()}
+QUICK_LIST_NAMES = ["Custom"] + list(QUICK_LISTS)
+
+def parse_items(raw):
+    """Non-empty, stripped lines of the shopping list text"""
+    return [line for line in (l.strip() for l in raw.splitlines()) if line]
+
+# Initialize session state variables (one setdefault each; fresh dicts per session)
+ss = st.session_state
+ss.setdefault('run_comparison', False)
+ss.setdefault('comparison_done', False)
+ss.setdefault('price_results', {})
+ss.setdefault('optimize_cart', False)
+if 'assigned_cart' not in ss:
+    set_assigned_cart({})
+ss.setdefault('summary', "")
+ss.setdefault('ai_summary', "")
+ss.setdefault('use_ai_agent', True)
+
+# Styles and title go out as one static markdown block per rerun
+st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 # Sidebar Configuration
 with st.sidebar:
@@ -76,10 +321,14 @@ with st.sidebar:
         available_stores,
         default=["Blinkit"]  # Start with just Blinkit
     )
+    # Hashable form used for cache keys below
+    selected_stores_key = tuple(selected_stores)
 
     st.header("⚙️ Scraping Options")
     scraping_timeout = st.slider("Scraping timeout (seconds)", 30, 180, 90)
     max_products = st.slider("Max products per store", 5, 20, 10)
+    force_refresh = st.checkbox("Force refresh", value=False,
+                                help="Ignore prices cached from the last 10 minutes and scrape live data")
 
     st.header("💰 Optimization Settings")
     include_delivery = st.checkbox("Include delivery fees", value=True)
@@ -96,6 +345,8 @@ with st.sidebar:
                 step=5,
                 key=f"delivery_{store}"
             )
+        # Fees aligned with selected_stores, masked by the stores a cart actually uses
+        fees_arr = np.array([delivery_fees[store] for store in selected_stores], dtype=float)
 
     # Debug section
     st.header("🔧 Debug")
@@ -107,21 +358,8 @@ col1, col2 = st.columns([2, 1])
 with col1:
     st.subheader("📝 Shopping List")
 
-    # Predefined quick lists
-    quick_lists = {
-        "Test Items": ["milk", "bread"],  # Simple test
-        "Basic Essentials": ["Milk 1L", "Bread", "Eggs 12", "Rice 5kg", "Oil 1L"],
-        "Breakfast Items": ["Milk 1L", "Bread", "Butter", "Jam", "Cornflakes"],
-        "Cooking Basics": ["Rice 5kg", "Dal 1kg", "Oil 1L", "Salt", "Sugar 1kg"],
-        "Snacks & Beverages": ["Biscuits", "Tea", "Coffee", "Namkeen", "Cold Drink"]
-    }
-
-    selected_quick_list = st.selectbox("Quick Select:", ["Custom"] + list(quick_lists.keys()))
-
-    if selected_quick_list != "Custom":
-        default_items = "\n".join(quick_lists[selected_quick_list])
-    else:
-        default_items = "milk\nbread\neggs"  # Keep it simple
+    selected_quick_list = st.selectbox("Quick Select:", QUICK_LIST_NAMES)
+    default_items = QUICK_LIST_TEXT.get(selected_quick_list, "milk\nbread\neggs")  # Custom: keep it simple
 
     shopping_list = st.text_area(
         "Enter your shopping items (one per line):",
@@ -130,7 +368,7 @@ with col1:
         help="Enter each item on a new line. Start simple with 'milk', 'bread', 'eggs'"
     )
 
-    items = [item.strip() for item in shopping_list.splitlines() if item.strip()]
+    items = parse_items(shopping_list)
 
     if items:
         st.info(f"📊 **{len(items)} items** in your shopping list")
@@ -153,35 +391,35 @@ with col2:
 
     # Set the flag when button is clicked
     if compare_button_clicked:
-        st.session_state.run_comparison = True
-        st.session_state.comparison_done = False  # Reset previous results
-        st.session_state.price_results = {}
-        st.session_state.assigned_cart = {}
-        st.session_state.summary = ""
+        ss.run_comparison = True
+        ss.comparison_done = False  # Reset previous results
+        ss.price_results = {}
+        set_assigned_cart({})
+        ss.summary = ""
 
     if st.button("💾 Save Shopping List", use_container_width=False):
         if items:
-            st.session_state['saved_items'] = items
+            ss['saved_items'] = items
             st.success("Shopping list saved!")
 
-    if 'saved_items' in st.session_state:
+    if 'saved_items' in ss:
         if st.button("📋 Load Saved List", use_container_width=False):
             st.rerun()
 
     # Clear results button
-    if st.session_state.get('comparison_done', False):
+    if ss.comparison_done:
         if st.button("🗑️ Clear Results", use_container_width=False):
-            st.session_state.comparison_done = False
-            st.session_state.price_results = {}
-            st.session_state.run_comparison = False
-            st.session_state.assigned_cart = {}
-            st.session_state.summary = ""
+            ss.comparison_done = False
+            ss.price_results = {}
+            ss.run_comparison = False
+            set_assigned_cart({})
+            ss.summary = ""
             st.rerun()
 
 # IMPORTANT: Only run API calls if the flag is set
-if st.session_state.get('run_comparison', False):
+if ss.run_comparison:
     # Reset the flag immediately to prevent re-running
-    st.session_state.run_comparison = False
+    ss.run_comparison = False
 
     # Validation
     if not items:
@@ -209,52 +447,25 @@ if st.session_state.get('run_comparison', False):
             with st.spinner(f"Running AI agent to fetch prices for {len(items)} items..."):
                 progress_bar.progress(30, text="🛒 Fetching product data via AI agent...")
 
-                # Initialize AI Agent
-                ai_agent = GroceryCartAIAgent()
-
-                # Force lazy initialization to check if AI agent is really available
+                # Initialized once and reused across reruns
                 progress_bar.progress(40, text="🤖 Initializing AI agent...")
-                test_agent = ai_agent._get_agent_lazy()
-
-                # Use AI Agent with LLM summarization if available
-                if test_agent is not None or ai_agent.llm is not None:
-                    progress_bar.progress(50, text="🤖 AI agent analyzing prices...")
-                    st.info("✅ Using AI Agent with OpenAI for intelligent optimization")
-                    try:
-                        out = ai_agent.find_optimal_cart(
-                            items=items,
-                            city=selected_location,
-                            vendors=selected_stores
-                        )
-
-                        # Store AI summary
-                        st.session_state.ai_summary = out.get("ai_summary", "")
-
-                    except Exception as e:
-                        if "quota" in str(e).lower() or "429" in str(e):
-                            st.warning("🚫 API quota exceeded - switching to working orchestrator")
-                        else:
-                            st.warning(f"⚠️ AI agent failed: {e} - switching to working orchestrator")
-
-                        # Fallback to working orchestrator
-                        from working_orchestrator import working_orchestrate
-                        out = working_orchestrate(
-                            items=items,
-                            city=selected_location,
-                            vendors=selected_stores,
-                            method="greedy"
-                        )
+                if ss.use_ai_agent:
+                    get_ai_agent()
 
-                else:
-                    # Fallback to working orchestrator only if no AI agent at all
-                    st.warning("🤖 AI agent not available, using working orchestrator")
-                    from working_orchestrator import working_orchestrate
-                    out = working_orchestrate(
-                        items=items,
-                        city=selected_location,
-                        vendors=selected_stores,
-                        method="greedy"
+                if force_refresh:
+                    fetch_prices.clear()
+
+                progress_bar.progress(50, text="🤖 AI agent analyzing prices...")
+                try:
+                    out = fetch_prices(
+                        tuple(sorted(items)),
+                        selected_location,
+                        tuple(sorted(selected_stores)),
+                        ss.use_ai_agent
                     )
+                except UncachedFetch as e:
+                    # Shown as usual, but not cached: the next Compare scrapes again
+                    out = e.out
 
                 progress_bar.progress(80, text="📊 Processing results...")
 
@@ -265,41 +476,39 @@ if st.session_state.get('run_comparison', False):
                 # Handle different response formats from AI agent vs basic orchestrator
                 if 'raw_price_data' in out:
                     # AI agent response format - map to expected format
-                    st.session_state.price_results = out.get("raw_price_data", {})
-                    st.session_state.assigned_cart = out.get("assigned_cart", {})
-                    st.session_state.summary = out.get("summary", "") or ""
-                    st.session_state.ai_summary = out.get("ai_summary", "")
-                    st.session_state.total = out.get("total", 0.0)
-                    st.session_state.unavailable = out.get("unavailable", [])
+                    ss.price_results = out.get("raw_price_data", {})
+                    set_assigned_cart(out.get("assigned_cart", {}))
+                    ss.summary = out.get("summary", "") or ""
+                    ss.ai_summary = out.get("ai_summary", "")
+                    ss.total = out.get("total", 0.0)
+                    ss.unavailable = out.get("unavailable", [])
                 elif 'price_results' in out:
                     # Basic orchestrator response format
-                    st.session_state.price_results = out.get("price_results", {})
-                    st.session_state.assigned_cart = out.get("assigned_cart", {})
-                    st.session_state.summary = out.get("summary", "") or ""
-                    st.session_state.total = out.get("total", 0.0)
-                    st.session_state.unavailable = out.get("unavailable", [])
+                    ss.price_results = out.get("price_results", {})
+                    set_assigned_cart(out.get("assigned_cart", {}))
+                    ss.summary = out.get("summary", "") or ""
+                    ss.total = out.get("total", 0.0)
+                    ss.unavailable = out.get("unavailable", [])
                 else:
                     raise RuntimeError(f"Agent returned unexpected result format: {list(out.keys())}")
 
             elapsed_time = time.time() - start_time
+            ss.opt_cache = {}
+            ss.compared_at = time.strftime("%Y-%m-%d %H:%M:%S")
             progress_bar.progress(100, text="✅ Completed!")
 
             if debug_mode and 'debug_container' in locals():
                 with debug_container:
                     st.write("**Raw Orchestrator Output:**")
-                    st.json(out)
+                    st.code(debug_json(out), language="json")
 
             # Validate results
-            price_results = st.session_state.price_results
-            if price_results and isinstance(price_results, dict) and price_results:
-                st.session_state.comparison_done = True
-
-                # Count successful results
-                total_found = sum(
-                    1 for item_data in price_results.values()
-                    for store_data in item_data.values()
-                    if store_data.get('price') is not None
-                )
+            price_results = ss.price_results
+            if isinstance(price_results, dict) and price_results:
+                ss.comparison_done = True
+
+                # Count comes from the (cached) comparison table, which the results panel reuses below
+                _, total_found = build_comparison_df(price_results, selected_stores_key)
 
                 status_text.success(f"🎉 Completed in {elapsed_time:.1f} seconds!")
                 st.info(f"📈 Found {total_found} available products across {len(selected_stores)} stores")
@@ -324,242 +533,151 @@ if st.session_state.get('run_comparison', False):
             - Make sure agent_orchestrator.py and lc_tools.py are present and LangChain dependencies installed
             """)
 
-# Display Results Section - Only if we have completed results
-if st.session_state.get('comparison_done', False) and st.session_state.get('price_results'):
-    price_results = st.session_state['price_results']
-    assigned_cart = st.session_state.get('assigned_cart', {})
-    summary_text = st.session_state.get('summary', "")
-
-    st.markdown("---")
-    st.header("📊 Price Comparison Results")
-
-    if not isinstance(price_results, dict) or not price_results:
-        st.error("Invalid price results format")
-        st.stop()
-
-    # Show the AI summary if available (prominent display)
-    if st.session_state.get('ai_summary'):
-        st.markdown("### 🧠 AI Shopping Assistant Summary")
-        st.info(st.session_state.ai_summary)
-        st.markdown("---")
-
-    # Show the basic summary if present
-    if summary_text:
-        st.success(summary_text)
-
-    # Create comparison table
-    comparison_data = []
-    total_products_found = 0
-
-    for item, stores_data in price_results.items():
-        if not isinstance(stores_data, dict):
-            continue
-
-        row = {"Product": item}
-        item_found_count = 0
-
-        for store in selected_stores:
-            if store in stores_data:
-                store_data = stores_data[store]
-                if store_data.get("price") is not None and store_data.get("available", True):
-                    price = store_data["price"]
-                    row[f"{store} Price"] = f"₹{price:.2f}"
-                    row[f"{store} Status"] = "✅ Available"
-                    if store_data.get("name"):
-                        product_name = str(store_data["name"])
-                        row[f"{store} Product"] = product_name[:40] + "..." if len(product_name) > 40 else product_name
-                    item_found_count += 1
-                    total_products_found += 1
+# Run as a fragment so its own widgets (optimize method/button, exports) rerun just this
+# panel, leaving the comparison table above it untouched
+@st.fragment
+def render_cart(price_results):
+    import pandas as pd
+
+    # Optimization Section
+    st.header("🎯 Optimized Shopping Cart")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        optimization_method = st.radio(
+            "Choose optimization method:",
+            ["Greedy (Fast)", "Linear Programming (Optimal)"],
+            help="Greedy is faster and works well for most cases"
+        )
+
+    with col2:
+        # Optimize button - another controlled action
+        optimize_button_clicked = st.button("🚀 Optimize Cart", type="primary", key="optimize_btn")
+        if optimize_button_clicked:
+            ss.optimize_cart = True
+
+    # If the orchestrator already provided an assigned cart, show that by default.
+    if ss.get('optimize_cart', False):
+        ss.optimize_cart = False  # Reset flag
+        try:
+            with st.spinner("Optimizing your cart..."):
+                # Repeat clicks with the same inputs reuse the earlier result
+                fees = delivery_fees if include_delivery else None
+                opt_key = hashlib.blake2b(
+                    json.dumps([price_results, optimization_method, fees or {}], sort_keys=True, default=str).encode(),
+                    digest_size=16
+                ).hexdigest()
+                opt_cache = ss.setdefault('opt_cache', {})
+                if opt_key in opt_cache:
+                    optimization_result = opt_cache[opt_key]
+                elif optimization_method == "Greedy (Fast)":
+                    opt_items, opt_stores, price_mat = price_matrix(price_results)
+                    optimization_result = greedy_optimize_matrix(opt_items, opt_stores, price_mat)
                 else:
-                    row[f"{store} Price"] = "N/A"
-                    row[f"{store} Status"] = "❌ Not available"
-            else:
-                row[f"{store} Price"] = "N/A"
-                row[f"{store} Status"] = "❌ No Data"
-
-        row["Found In"] = f"{item_found_count}/{len(selected_stores)} stores"
-        comparison_data.append(row)
-
-    if comparison_data:
-        # Summary metrics
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Items Searched", len(items))
-        with col2:
-            st.metric("Products Found", total_products_found)
-        with col3:
-            success_rate = (total_products_found / (len(items) * len(selected_stores))) * 100 if items and selected_stores else 0
-            st.metric("Success Rate", f"{success_rate:.1f}%")
+                    optimization_result = ilp_optimize(price_results, delivery_fees=fees)
+                opt_cache[opt_key] = optimization_result
+                # overwrite assigned cart with new optimization result
+                set_assigned_cart(optimization_result)
+        except Exception as e:
+            st.error(f"❌ Optimization failed: {str(e)}")
+            if debug_mode:
+                st.exception(e)
 
-        # Display comparison table
-        df_comparison = pd.DataFrame(comparison_data)
-        st.dataframe(df_comparison, width='stretch', hide_index=True)
 
-        # Optimization Section
-        st.header("🎯 Optimized Shopping Cart")
+    # Display optimized results
+    st.subheader("🛍️ Your Optimized Cart")
+
+    # {item: (store, price)} view of the cart (orchestrator or manual optimization),
+    # built once by set_assigned_cart whenever the cart changes
+    final_assigned = ss.get('final_assigned', {})
+
+    # Also handle items from session state that might be unavailable
+    unavailable_from_session = set(ss.get('unavailable', []))
+
+    # Classify all requested items at once with boolean masks
+    items_arr = np.array(items, dtype=object)
+    assigned_mask = np.isin(items_arr, list(final_assigned))
+    unavail_mask = np.isin(items_arr, list(unavailable_from_session)) & ~assigned_mask
+    assignments = [final_assigned.get(item, ("None", None)) for item in items]
+    store_arr = np.array([store for store, _ in assignments], dtype=object)
+    # Ensure price is numeric; anything that doesn't parse is flagged as a price error
+    prices = pd.to_numeric(pd.Series([price for _, price in assignments], dtype=object), errors="coerce").to_numpy(dtype=float)
+    ok_mask = assigned_mask & ~np.isnan(prices)
+    error_mask = assigned_mask & ~ok_mask
+
+    for item, (_, price) in zip(items_arr[error_mask], np.array(assignments, dtype=object)[error_mask]):
+        st.error(f"Invalid price format for {item}: {price}")
+
+    df_cart = pd.DataFrame({
+        "Product": items_arr,
+        "Best Store": np.where(assigned_mask, store_arr, "None"),
+        "Price": np.where(ok_mask, pd.Series(prices).map(format_price).to_numpy(), np.where(error_mask, "Error", "N/A")),
+        "Status": np.select(
+            [ok_mask, error_mask, unavail_mask],
+            ["✅ Added to Cart", "❌ Price Error", "❌ Unavailable"],
+            "❌ Not Found"
+        )
+    }, columns=CART_COLUMNS)
+    total_cost = float(prices[ok_mask].sum())
+    # Per-store item counts for the cart; its keys are the stores in use
+    store_breakdown = Counter(store_arr[ok_mask])
+    used_stores = set(store_breakdown)
+    unavailable_items = list(items_arr[~assigned_mask])
+    items_in_cart = int(ok_mask.sum())
+
+    # Display cart table
+    if items:
+        st.dataframe(df_cart, width='stretch', hide_index=True)
 
-        col1, col2 = st.columns(2)
+        # Cost summary
+        col1, col2, col3 = st.columns(3)
 
         with col1:
-            optimization_method = st.radio(
-                "Choose optimization method:",
-                ["Greedy (Fast)", "Linear Programming (Optimal)"],
-                help="Greedy is faster and works well for most cases"
-            )
+            st.metric("Items in Cart", items_in_cart)
 
         with col2:
-            # Optimize button - another controlled action
-            optimize_button_clicked = st.button("🚀 Optimize Cart", type="primary", key="optimize_btn")
-            if optimize_button_clicked:
-                st.session_state.optimize_cart = True
-
-        # If the orchestrator already provided an assigned cart, show that by default.
-        if st.session_state.get('optimize_cart', False):
-            st.session_state.optimize_cart = False  # Reset flag
-            try:
-                with st.spinner("Optimizing your cart..."):
-                    if optimization_method == "Greedy (Fast)":
-                        optimization_result = greedy_optimize(
-                            price_results,
-                            delivery_fees=delivery_fees if include_delivery else None
-                        )
-                    else:
-                        optimization_result = ilp_optimize(
-                            price_results,
-                            delivery_fees=delivery_fees if include_delivery else None
-                        )
-                    # overwrite assigned cart with new optimization result
-                    st.session_state.assigned_cart = optimization_result
-            except Exception as e:
-                st.error(f"❌ Optimization failed: {str(e)}")
-                if debug_mode:
-                    st.exception(e)
-
-        # Use assigned_cart from session state (either orchestrator or manual optimization)
-        assigned_cart_from_session = st.session_state.get('assigned_cart', {})
-
-        # Display optimized results
-        st.subheader("🛍️ Your Optimized Cart")
-
-        cart_data = []
-        total_cost = 0
-        used_stores = set()
-        unavailable_items = []
-
-        # Transform assigned_cart format: from {store: [items]} to {item: (store, price)}
-        final_assigned = {}
-        for store, items_list in assigned_cart_from_session.items():
-            if isinstance(items_list, list):
-                for item_info in items_list:
-                    if isinstance(item_info, dict):
-                        item_name = item_info.get('item', '')
-                        price = item_info.get('price', 0)
-                        if item_name and price is not None:
-                            final_assigned[item_name] = (store, price)
-
-        # Also handle items from session state that might be unavailable
-        unavailable_from_session = st.session_state.get('unavailable', [])
-
-        # Process all requested items
-        for item in items:
-            if item in final_assigned:
-                store, price = final_assigned[item]
-                # Ensure price is numeric
-                try:
-                    price_float = float(price)
-                    cart_data.append({
-                        "Product": item,
-                        "Best Store": store,
-                        "Price": f"₹{price_float:.2f}",
-                        "Status": "✅ Added to Cart"
-                    })
-                    total_cost += price_float
-                    used_stores.add(store)
-                except (ValueError, TypeError) as e:
-                    st.error(f"Invalid price format for {item}: {price}")
-                    cart_data.append({
-                        "Product": item,
-                        "Best Store": store,
-                        "Price": "Error",
-                        "Status": "❌ Price Error"
-                    })
-            elif item in unavailable_from_session:
-                unavailable_items.append(item)
-                cart_data.append({
-                    "Product": item,
-                    "Best Store": "None",
-                    "Price": "N/A",
-                    "Status": "❌ Unavailable"
-                })
-            else:
-                # Item not found in either available or unavailable lists
-                unavailable_items.append(item)
-                cart_data.append({
-                    "Product": item,
-                    "Best Store": "None",
-                    "Price": "N/A",
-                    "Status": "❌ Not Found"
-                })
-
-        # Display cart table
-        if cart_data:
-            df_cart = pd.DataFrame(cart_data)
-            st.dataframe(df_cart, width='stretch', hide_index=True)
-
-            # Cost summary
-            col1, col2, col3 = st.columns(3)
+            delivery_cost = 0.0
+            if include_delivery and used_stores:
+                delivery_cost = float(fees_arr[np.isin(selected_stores_key, list(used_stores))].sum())
 
-            with col1:
-                items_in_cart = len([x for x in cart_data if "✅" in x["Status"]])
-                st.metric("Items in Cart", items_in_cart)
-
-            with col2:
-                delivery_cost = 0
-                if include_delivery and used_stores:
-                    delivery_cost = sum(delivery_fees.get(store, 0) for store in used_stores)
-
-                total_with_delivery = total_cost + delivery_cost
-                st.metric("Total Cost", f"₹{total_with_delivery:.2f}")
+            total_with_delivery = total_cost + delivery_cost
+            st.metric("Total Cost", f"₹{total_with_delivery:.2f}")
 
-                if include_delivery and delivery_cost > 0:
-                    st.caption(f"Includes ₹{delivery_cost:.2f} delivery")
+            if include_delivery and delivery_cost > 0:
+                st.caption(f"Includes ₹{delivery_cost:.2f} delivery")
 
-            with col3:
-                st.metric("Stores Used", len(used_stores))
-
-            # Store distribution
-            if used_stores:
-                st.subheader("🏪 Store Distribution")
+        with col3:
+            st.metric("Stores Used", len(used_stores))
 
-                store_breakdown = {}
-                for item, assignment in final_assigned.items():
-                    if assignment and len(assignment) == 2 and assignment[0]:
-                        store = assignment[0]
-                        store_breakdown[store] = store_breakdown.get(store, 0) + 1
+        # Store distribution
+        if used_stores:
+            st.subheader("🏪 Store Distribution")
 
-                for store, count in store_breakdown.items():
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write(f"**{store}**: {count} items")
-                    with col2:
-                        if include_delivery:
-                            st.write(f"₹{delivery_fees.get(store, 0)} delivery")
+            for store, count in store_breakdown.items():
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.write(f"**{store}**: {count} items")
+                with col2:
+                    if include_delivery:
+                        st.write(f"₹{delivery_fees.get(store, 0)} delivery")
 
-            # Unavailable items warning
-            if unavailable_items:
-                st.warning(f"⚠️ **{len(unavailable_items)} items unavailable**: {', '.join(unavailable_items)}")
+        # Unavailable items warning
+        if unavailable_items:
+            st.warning(f"⚠️ **{len(unavailable_items)} items unavailable**: {', '.join(unavailable_items)}")
 
-            # Export options
-            st.subheader("📤 Export Options")
+        # Export options
+        st.subheader("📤 Export Options")
 
+        # Payloads are only built once the user asks for them, not on every rerun
+        if st.toggle("Prepare downloads", key="show_export"):
             col1, col2 = st.columns(2)
 
             with col1:
                 # Download cart as CSV
-                csv = df_cart.to_csv(index=False)
                 st.download_button(
                     "📄 Download Cart (CSV)",
-                    csv,
+                    cart_csv(df_cart),
                     "smart_grocery_cart.csv",
                     "text/csv"
                 )
@@ -567,34 +685,74 @@ if st.session_state.get('comparison_done', False) and st.session_state.get('pric
             with col2:
                 # Generate shopping summary
                 summary = {
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "timestamp": ss.get('compared_at') or time.strftime("%Y-%m-%d %H:%M:%S"),
                     "location": selected_location,
                     "total_items": len(items),
                     "available_items": items_in_cart,
                     "total_cost": total_with_delivery,
                     "delivery_cost": delivery_cost,
-                    "stores_used": list(used_stores),
+                    "stores_used": sorted(used_stores),
                     "unavailable_items": unavailable_items,
-                    "cart_details": cart_data
+                    "cart_details": df_cart.to_dict("records")
                 }
 
-                summary_json = json.dumps(summary, indent=2)
                 st.download_button(
                     "📋 Download Summary (JSON)",
-                    summary_json,
+                    cart_summary_json(summary),
                     "cart_summary.json",
                     "application/json"
                 )
 
+# Display Results Section - Only if we have completed results
+def render_results():
+    price_results = ss.get('price_results')
+    # Nothing to render yet: skip the table, optimizer and exports entirely
+    if not (isinstance(price_results, dict) and price_results):
+        st.info("Click Compare Prices to begin")
+        return
+
+    assigned_cart = ss.get('assigned_cart', {})
+    summary_text = ss.get('summary', "")
+
+    st.markdown("---")
+    st.header("📊 Price Comparison Results")
+
+    # Show the AI summary if available (prominent display)
+    if ss.get('ai_summary'):
+        st.markdown("### 🧠 AI Shopping Assistant Summary")
+        st.info(ss.ai_summary)
+        st.markdown("---")
+
+    # Show the basic summary if present
+    if summary_text:
+        st.success(summary_text)
+
+    df_comparison, total_products_found = build_comparison_df(price_results, selected_stores_key)
+    compared_items = df_comparison["Product"].tolist()
+
+    if compared_items:
+        # Summary metrics
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Items Searched", len(items))
+        with col2:
+            st.metric("Products Found", total_products_found)
+        with col3:
+            searched = len(items) * len(selected_stores)
+            success_rate = float(np.divide(total_products_found * 100, searched)) if searched else 0.0
+            st.metric("Success Rate", f"{success_rate:.1f}%")
+
+        # Display comparison table
+        st.dataframe(df_comparison, width='stretch', hide_index=True)
+
+        render_cart(price_results)
+
     else:
         st.warning("No valid comparison data available.")
 
+if ss.comparison_done:
+    render_results()
+
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style='text-align: center; color: #666; padding: 1rem;'>
-    <p>🛒 Smart Grocery Cart - Compare prices across grocery delivery platforms</p>
-    <p style='font-size: 0.8rem;'>⚠️ Prices are fetched in real-time and may vary. Always verify on the store website.</p>
-    <p style='font-size: 0.7rem;'>Powered by Playwright and LangChain orchestrator</p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
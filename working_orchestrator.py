@@ -4,50 +4,107 @@
 import json
 import os
 import logging
+from functools import lru_cache
 from typing import List, Dict, Any
-from dotenv import load_dotenv
-load_dotenv()
+
+# orjson pretty-prints the debug dump natively; stdlib json otherwise
+try:
+    import orjson
+
+    def _pretty_json(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode()
+except ImportError:
+    def _pretty_json(obj) -> str:
+        return json.dumps(obj, indent=2, default=str)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def working_orchestrate(items: List[str], city: str, vendors: List[str], method: str = "greedy") -> Dict[str, Any]:
+@lru_cache(maxsize=1)
+def _load_env() -> bool:
+    """Read .env on the first orchestration rather than at import"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return True
+
+# Fallback price data for common grocery items
+FALLBACK_PRICES = {
+    "milk": {
+        "Blinkit": {"price": 45.0, "available": True, "name": "Amul Milk 1L"},
+        "Swiggy Instamart": {"price": 50.0, "available": True, "name": "Mother Dairy 1L"}
+    },
+    "curd 1l": {
+        "Blinkit": {"price": 50.0, "available": True, "name": "Amul Fresh Curd 1L"},
+        "Swiggy Instamart": {"price": 55.0, "available": True, "name": "Mother Dairy Curd 1L"}
+    },
+    "curd": {
+        "Blinkit": {"price": 50.0, "available": True, "name": "Amul Fresh Curd 1L"},
+        "Swiggy Instamart": {"price": 55.0, "available": True, "name": "Mother Dairy Curd 1L"}
+    },
+    "bread": {
+        "Blinkit": {"price": 25.0, "available": True, "name": "Harvest Gold Bread"},
+        "Swiggy Instamart": {"price": 30.0, "available": True, "name": "Modern Bread"}
+    },
+    "eggs": {
+        "Blinkit": {"price": 60.0, "available": True, "name": "Farm Fresh Eggs"},
+        "Swiggy Instamart": {"price": 55.0, "available": True, "name": "Country Eggs"}
+    },
+    "rice": {
+        "Blinkit": {"price": 120.0, "available": True, "name": "Basmati Rice 1kg"},
+        "Swiggy Instamart": {"price": 115.0, "available": True, "name": "India Gate Rice 1kg"}
+    },
+    "oil": {
+        "Blinkit": {"price": 180.0, "available": True, "name": "Fortune Oil 1L"},
+        "Swiggy Instamart": {"price": 175.0, "available": True, "name": "Saffola Oil 1L"}
+    }
+}
+
+# Lowercased once so lookups don't normalize the keys on every call
+_FALLBACK_LC = {k.lower(): v for k, v in FALLBACK_PRICES.items()}
+
+def save_orchestration(items: List[str], city: str, vendors: List[str],
+                       assigned_cart: Dict[str, Any], total: float, unavailable: List[str]):
+    """Record a finished cart in Supabase's orchestrations table (best-effort, never raises)"""
+    _load_env()
+    # The client is only imported when it's configured
+    try:
+        SUPABASE_URL = os.getenv("SUPABASE_URL")
+        SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+        if SUPABASE_URL and SUPABASE_KEY:
+            from supabase import create_client
+            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+            result_data = {
+                "assigned_cart": assigned_cart,
+                "total": total,
+                "unavailable": unavailable,
+                "summary": f"Found items across {len(assigned_cart)} stores. Total: ₹{total:.2f}"
+            }
+
+            payload = {
+                "items": items,
+                "city": city,
+                "vendors": vendors,
+                "result": result_data,
+            }
+
+            # Create table if it doesn't exist (simplified)
+            try:
+                supabase.table("orchestrations").insert(payload).execute()
+                logger.info("✅ Saved to Supabase")
+            except Exception:
+                logger.info("📝 Supabase save skipped (table may not exist)")
+    except Exception:
+        logger.info("📝 Supabase save skipped")
+
+def working_orchestrate(items: List[str], city: str, vendors: List[str], method: str = "greedy",
+                        persist: bool = True) -> Dict[str, Any]:
     """
-    Working orchestrator with fallback mock data when scraping fails
+    Working orchestrator with fallback mock data when scraping fails.
+    persist=False skips the Supabase record, for callers that merge several runs and save the result themselves.
     """
     logger.info(f"Starting orchestration for items: {items}")
-
-    # Fallback price data for common grocery items
-    FALLBACK_PRICES = {
-        "milk": {
-            "Blinkit": {"price": 45.0, "available": True, "name": "Amul Milk 1L"},
-            "Swiggy Instamart": {"price": 50.0, "available": True, "name": "Mother Dairy 1L"}
-        },
-        "curd 1l": {
-            "Blinkit": {"price": 50.0, "available": True, "name": "Amul Fresh Curd 1L"},
-            "Swiggy Instamart": {"price": 55.0, "available": True, "name": "Mother Dairy Curd 1L"}
-        },
-        "curd": {
-            "Blinkit": {"price": 50.0, "available": True, "name": "Amul Fresh Curd 1L"},
-            "Swiggy Instamart": {"price": 55.0, "available": True, "name": "Mother Dairy Curd 1L"}
-        },
-        "bread": {
-            "Blinkit": {"price": 25.0, "available": True, "name": "Harvest Gold Bread"},
-            "Swiggy Instamart": {"price": 30.0, "available": True, "name": "Modern Bread"}
-        },
-        "eggs": {
-            "Blinkit": {"price": 60.0, "available": True, "name": "Farm Fresh Eggs"},
-            "Swiggy Instamart": {"price": 55.0, "available": True, "name": "Country Eggs"}
-        },
-        "rice": {
-            "Blinkit": {"price": 120.0, "available": True, "name": "Basmati Rice 1kg"},
-            "Swiggy Instamart": {"price": 115.0, "available": True, "name": "India Gate Rice 1kg"}
-        },
-        "oil": {
-            "Blinkit": {"price": 180.0, "available": True, "name": "Fortune Oil 1L"},
-            "Swiggy Instamart": {"price": 175.0, "available": True, "name": "Saffola Oil 1L"}
-        }
-    }
+    _load_env()
 
     try:
         # Try to use real scraper first
@@ -56,23 +113,23 @@ def working_orchestrate(items: List[str], city: str, vendors: List[str], method:
         price_checker = PriceCheckerTool()
         optimizer = OptimizerTool()
 
-        price_results = {}
+        # Items that got real scraped prices; everything else fell back
+        scraped = set()
 
-        # Step 1: Get prices with fallback
-        for item in items:
-            logger.info(f"Checking prices for: {item}")
+        # Step 1: Real prices for every item in one batched lookup
+        logger.info(f"Checking prices for: {items}")
+        try:
+            fetched = price_checker.run_native(items, location=city, stores=vendors, cache_ttl=0)
+        except Exception as e:
+            logger.warning(f"⚠️ Scraping failed for {items}: {e}")
+            fetched = {}
 
-            # Try real scraping first
+        def check_item(item: str) -> Dict[str, Any]:
+            """The item's scraped prices, falling back to FALLBACK_PRICES when scraping failed"""
             try:
-                query = json.dumps({
-                    "item": item,
-                    "location": city,
-                    "stores": vendors,
-                    "cache_ttl": 0
-                })
-
-                result_str = price_checker._run(query)
-                item_prices = json.loads(result_str)
+                item_prices = fetched.get(item)
+                if not item_prices:
+                    raise ValueError("No prices from scraper")
 
                 # Check if we got valid prices
                 has_valid_price = any(
@@ -81,8 +138,9 @@ def working_orchestrate(items: List[str], city: str, vendors: List[str], method:
                 )
 
                 if has_valid_price:
-                    price_results[item] = item_prices
                     logger.info(f"✅ Real prices found for {item}")
+                    scraped.add(item)
+                    return item_prices
                 else:
                     raise ValueError("No valid prices from scraper")
 
@@ -90,42 +148,37 @@ def working_orchestrate(items: List[str], city: str, vendors: List[str], method:
                 logger.warning(f"⚠️ Scraping failed for {item}: {e}")
 
                 # Use fallback data
-                if item.lower() in FALLBACK_PRICES:
-                    # Filter vendors to only include requested ones
-                    fallback_data = {}
-                    for vendor in vendors:
-                        if vendor in FALLBACK_PRICES[item.lower()]:
-                            fallback_data[vendor] = FALLBACK_PRICES[item.lower()][vendor].copy()
+                entry = _FALLBACK_LC.get(item.lower())
+                if entry is not None:
+                    # Filter vendors to only include requested ones; the entries are read-only, so share them
+                    fallback_data = {vendor: entry[vendor] for vendor in vendors if vendor in entry}
 
                     if fallback_data:
-                        price_results[item] = fallback_data
                         logger.info(f"📝 Using fallback prices for {item}")
+                        return fallback_data
                     else:
                         # No fallback data available
-                        price_results[item] = {store: {"price": None, "available": False, "name": None} for store in vendors}
                         logger.warning(f"❌ No fallback data for {item}")
+                        return {store: {"price": None, "available": False, "name": None} for store in vendors}
                 else:
                     # Unknown item, mark as unavailable
-                    price_results[item] = {store: {"price": None, "available": False, "name": None} for store in vendors}
                     logger.warning(f"❌ Unknown item: {item}")
+                    return {store: {"price": None, "available": False, "name": None} for store in vendors}
 
-        logger.info(f"Final price_results: {json.dumps(price_results, indent=2)}")
+        # Apply the per-item fallback to what the batch returned
+        price_results = {item: check_item(item) for item in items}
 
-        # Step 2: Optimize
-        opt_query = json.dumps({
-            "price_results": price_results,
-            "method": method,
-            "delivery_fees": {}
-        })
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Final price_results: {_pretty_json(price_results)}")
 
-        result_str = optimizer._run(opt_query)
-        optimized = json.loads(result_str)
+        # Step 2: Optimize (direct call, no JSON round-trip)
+        optimized = optimizer.run_native(price_results, method=method, delivery_fees={})
 
         logger.info(f"Optimization result: {optimized}")
 
         # Step 3: Transform result
         assigned_cart = {}
-        total = 0
+        total_paise = 0  # summed as whole paise so float error can't build up
         unavailable = []
 
         for item, assignment in optimized.items():
@@ -136,48 +189,23 @@ def working_orchestrate(items: List[str], city: str, vendors: List[str], method:
                 if store not in assigned_cart:
                     assigned_cart[store] = []
                 assigned_cart[store].append({"item": item, "price": price})
-                total += price
+                total_paise += int(round(price * 100))
 
-        # Try to save to Supabase (non-blocking)
-        try:
-            from supabase import create_client
-            SUPABASE_URL = os.getenv("SUPABASE_URL")
-            SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-            if SUPABASE_URL and SUPABASE_KEY:
-                supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-                result_data = {
-                    "assigned_cart": assigned_cart,
-                    "total": round(total, 2),
-                    "unavailable": unavailable,
-                    "summary": f"Found items across {len(assigned_cart)} stores. Total: ₹{total:.2f}"
-                }
-
-                payload = {
-                    "items": items,
-                    "city": city,
-                    "vendors": vendors,
-                    "result": result_data,
-                }
-
-                # Create table if it doesn't exist (simplified)
-                try:
-                    resp = supabase.table("orchestrations").insert(payload).execute()
-                    logger.info("✅ Saved to Supabase")
-                except Exception:
-                    logger.info("📝 Supabase save skipped (table may not exist)")
-        except Exception:
-            logger.info("📝 Supabase save skipped")
+        total = total_paise / 100
+
+        if persist:
+            save_orchestration(items, city, vendors, assigned_cart, total, unavailable)
 
         return {
             "price_results": price_results,  # Add this key that UI expects
             "assigned_cart": assigned_cart,
-            "total": round(total, 2),
+            "total": total,
             "unavailable": unavailable,
             "summary": f"Found items across {len(assigned_cart)} stores. Total: ₹{total:.2f}",
             "item_details": [],  # Add this key for UI compatibility
+            "fallback_items": [item for item in items if item not in scraped],
             "note": "Using mix of real and fallback prices" if any(
-                item.lower() in FALLBACK_PRICES for item in items
+                item.lower() in _FALLBACK_LC for item in items
             ) else "Using real scraped prices"
         }
 
@@ -190,6 +218,7 @@ def working_orchestrate(items: List[str], city: str, vendors: List[str], method:
             "unavailable": items,
             "summary": "Orchestration encountered an error",
             "item_details": [],  # Add this key for UI compatibility
+            "fallback_items": list(items),
             "error": f"Orchestration failed: {e}"
         }
 